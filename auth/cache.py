@@ -0,0 +1,24 @@
+import hashlib
+from typing import Any
+
+from auth.models.db import User
+from config import settings
+from utils.cache import TTLCache
+
+token_cache = TTLCache("token", maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+user_cache = TTLCache("user", maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+profile_cache = TTLCache("profile", maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL)
+
+
+def get_token_key(token: str, token_type: str) -> tuple[str, str]:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest(), token_type
+
+
+def get_user_snapshot(user: User) -> User:
+    """Detached copy of the user that is safe to hand to any request"""
+    return User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+
+def invalidate_user(user_id: Any) -> None:
+    user_cache.pop(str(user_id))
+    profile_cache.pop(str(user_id))
@@ -5,6 +5,7 @@ from fastapi import Depends, HTTPException
 from starlette import status
 from starlette.requests import Request
 
+from auth.cache import token_cache, user_cache, get_token_key, get_user_snapshot
 from auth.user_dao import UserDAO
 from auth.models.db import User
 from config import settings
@@ -18,11 +19,7 @@ async def check_jwt(request: Request, user_dao: UserDAO = Depends()) -> User:
     :return:
     """
     user_token = request.headers.get("Authorization")
-    user_id = check_token_payload_and_get_user_id(user_token, token_type="access")
-    user = await user_dao.get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"detail": "Unauthorized7"})
-    return user
+    return await get_token_user(user_token, "access", user_dao, "Unauthorized7")
 
 
 async def check_jwt_refresh(request: Request, user_dao: UserDAO = Depends()) -> User:
@@ -33,10 +30,32 @@ async def check_jwt_refresh(request: Request, user_dao: UserDAO = Depends()) ->
     :return:
     """
     user_token = request.headers.get("Authorization")
-    user_id = check_token_payload_and_get_user_id(user_token, token_type="refresh")
-    user = await user_dao.get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"detail": "Unauthorized"})
+    return await get_token_user(user_token, "refresh", user_dao, "Unauthorized")
+
+
+async def get_token_user(token: str | None, token_type: str, user_dao: UserDAO, missing_user_detail: str) -> User:
+    """
+    Resolves the token owner, using the verified token and user caches before the database
+    :param token:
+    :param token_type:
+    :param user_dao:
+    :param missing_user_detail: detail of the 401 raised when the user does not exist
+    :return: user snapshot
+    """
+    token_key = get_token_key(token, token_type) if token else None
+    user_id = token_cache.get(token_key) if token_key else None
+    if user_id is None:
+        payload = check_token_payload(token, token_type)
+        user_id = payload["user_id"]
+        token_cache.set(token_key, user_id, ttl=payload["exp"] - datetime.datetime.utcnow().timestamp())
+
+    user = user_cache.get(str(user_id))
+    if user is None:
+        user = await user_dao.get_user_by_id(user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"detail": missing_user_detail})
+        user = get_user_snapshot(user)
+        user_cache.set(str(user_id), user)
     return user
 
 
@@ -47,6 +66,16 @@ def check_token_payload_and_get_user_id(token: str | None, token_type: str) -> s
     :param token_type:
     :return: user_id
     """
+    return check_token_payload(token, token_type)["user_id"]
+
+
+def check_token_payload(token: str | None, token_type: str) -> dict:
+    """
+    jwt token validation
+    :param token:
+    :param token_type:
+    :return: decoded payload
+    """
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"detail": "Unauthorized1"})
     try:
@@ -67,4 +96,4 @@ def check_token_payload_and_get_user_id(token: str | None, token_type: str) -> s
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"detail": "Unauthorized5"})
     if jwt_decode["exp"] < datetime.datetime.utcnow().timestamp():
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail={"detail": "Unauthorized6"})
-    return user_id
+    return jwt_decode
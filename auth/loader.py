@@ -0,0 +1,78 @@
+import asyncio
+import contextvars
+import time
+import uuid
+from typing import Iterable
+
+from auth.cache import profile_cache
+from auth.repository import UserRepository
+from tournaments.models.schemas import BriefUserSchema
+from utils.metrics import USER_LOADER_PENDING, USER_LOADER_BATCHES, USER_LOADER_PROFILES, USER_LOADER_DB_TIME
+
+
+class UserLoader:
+    """Brief profiles for all the requests of a worker. Ids asked for within one event loop tick are loaded
+    with a single IN query and fanned out to every request waiting for them, loaded profiles are cached
+    for PROFILE_CACHE_TTL.
+
+    The batch query runs outside of the requests, so it is not in their QueryStats, http_request_db_queries
+    or query budgets. It is counted by user_loader_batches_total and user_loader_batch_seconds, and by
+    db_queries_total like every statement"""
+
+    def __init__(self):
+        self.pending: dict[uuid.UUID, asyncio.Future] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    async def load_many(self, users_id: Iterable[uuid.UUID | None]) -> dict[uuid.UUID, BriefUserSchema]:
+        """Profiles by id, users that don't exist are left out"""
+        profiles = {}
+        waiting = {}
+        for user_id in set(users_id) - {None}:
+            profile = profile_cache.get(str(user_id))
+            if profile is not None:
+                profiles[user_id] = profile
+                continue
+            if user_id not in self.pending:
+                if not self.pending:
+                    asyncio.get_running_loop().call_soon(self.dispatch)
+                self.pending[user_id] = asyncio.get_running_loop().create_future()
+                USER_LOADER_PENDING.inc()
+            waiting[user_id] = self.pending[user_id]
+        if waiting:
+            # a cancelled request must not cancel the load for the others waiting on it
+            loaded = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+            profiles.update((user_id, profile) for user_id, profile in zip(waiting, loaded) if profile is not None)
+        return profiles
+
+    def dispatch(self) -> None:
+        batch, self.pending = self.pending, {}
+        USER_LOADER_PENDING.dec(len(batch))
+        # the query belongs to no single request, it runs without their QueryStats
+        task = asyncio.create_task(self.load_batch(batch), context=contextvars.Context())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def load_batch(self, batch: dict[uuid.UUID, asyncio.Future]) -> None:
+        USER_LOADER_BATCHES.inc()
+        started = time.perf_counter()
+        try:
+            rows = await UserRepository().get_brief_profiles(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            USER_LOADER_DB_TIME.observe(time.perf_counter() - started)
+        profiles = {row.id: BriefUserSchema.model_construct(id=row.id, full_name=row.full_name,
+                                                            avatar_id=row.avatar_id) for row in rows}
+        USER_LOADER_PROFILES.inc(len(profiles))
+        for user_id, future in batch.items():
+            profile = profiles.get(user_id)
+            if profile is not None:
+                profile_cache.set(str(user_id), profile)
+            if not future.done():
+                future.set_result(profile)
+
+
+user_loader = UserLoader()
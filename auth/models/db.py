@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, Integer, String, DateTime, func, UUID, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, func, UUID, Boolean, Index
 
 from database import Base
 
@@ -15,3 +15,7 @@ class User(Base):
     gender = Column(String, nullable=False)
     birthdate = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     avatar_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_user_email', email),
+    )
@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import bcrypt
+
+from config import settings
+from utils.metrics import PASSWORD_HASH_WAITING, PASSWORD_HASH_RUNNING, PASSWORD_HASHES
+
+T = TypeVar("T")
+
+# bcrypt releases the GIL while hashing, so a thread pool is enough to keep the event loop free. The pool
+# is created on first use after every shutdown and the semaphore per event loop, so a process can run
+# the app's lifespan more than once
+_executor: ThreadPoolExecutor | None = None
+_semaphore: asyncio.Semaphore | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_limits() -> tuple[ThreadPoolExecutor, asyncio.Semaphore]:
+    global _executor, _semaphore, _loop
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        _semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+        _loop = loop
+    return _executor, _semaphore
+
+
+async def _run_limited(func: Callable[..., T], *args) -> T:
+    executor, semaphore = _get_limits()
+    PASSWORD_HASH_WAITING.inc()
+    try:
+        await semaphore.acquire()
+    finally:
+        PASSWORD_HASH_WAITING.dec()
+    PASSWORD_HASH_RUNNING.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        PASSWORD_HASH_RUNNING.dec()
+        PASSWORD_HASHES.inc()
+        semaphore.release()
+
+
+def _hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+async def hash_password(password: str) -> str:
+    return await _run_limited(_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run_limited(_verify, password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a cost factor other than the configured one"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+def shutdown_password_hashing() -> None:
+    global _executor, _semaphore, _loop
+    executor, _executor, _semaphore, _loop = _executor, None, None, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
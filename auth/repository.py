@@ -9,3 +9,10 @@ from database import async_session_maker
 
 class UserRepository(SQLALchemyRepository):
     model = User
+
+    async def get_brief_profiles(self, users_id: list[uuid.UUID]):
+        async with self.read_session() as session:
+            query = select(self.model.id, self.model.full_name, self.model.avatar_id)\
+                .where(self.model.id.in_(users_id))
+            result = await session.execute(query)
+            return result.all()
@@ -1,9 +1,11 @@
-import bcrypt
 import jwt
 from fastapi import APIRouter, Depends, Header, HTTPException
 from starlette import status
 from starlette.requests import Request
 
+from auth.cache import invalidate_user
+from auth.password import hash_password, verify_password, needs_rehash
+from auth.repository import UserRepository
 from auth.user_dao import UserDAO
 from auth.models.schemas import (
     CreateUserRequest,
@@ -37,7 +39,7 @@ async def create_user(
         is_account_confirm = True
     user = await user_dao.create_user(
         email=user_request.email.lower(),
-        password=bcrypt.hashpw(user_request.password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8"),
+        password=await hash_password(user_request.password),
         full_name=user_request.full_name,
         birthdate=user_request.birthdate,
         gender=user_request.gender,
@@ -57,8 +59,12 @@ async def login(user_request: LoginUserRequest, user_dao: UserDAO = Depends()) -
     Endpoint for user login.
     """
     user = await user_dao.get_user_by_email(user_request.email.lower())
-    if not user or not bcrypt.checkpw(user_request.password.encode("utf-8"), user.hashed_password.encode("utf-8")):
+    if not user or not await verify_password(user_request.password, user.hashed_password):
         raise HTTPException(status_code=401, detail={"detail": "Неверный логин или пароль"})
+    if needs_rehash(user.hashed_password):
+        hashed_password = await hash_password(user_request.password)
+        await UserRepository(user_dao.session).update_one(record_id=user.id, data={"hashed_password": hashed_password})
+        invalidate_user(user.id)
     result = await user_dao.create_tokens(email=user.email)
     return LoginUserResponseSuccess(status=Status.OK, result=result)
 
@@ -7,6 +7,7 @@ from sqlalchemy import select, update
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from auth.cache import invalidate_user
 from auth.repository import UserRepository
 from database import get_async_session
 from auth.models.db import User
@@ -45,7 +46,7 @@ class UserDAO:
         """
         user_dict = {"email": email, "hashed_password": password, "full_name": full_name,
                      "birthdate": birthdate, "gender": gender, "avatar_id": 1}
-        user = await UserRepository().add_one(user_dict)
+        user = await UserRepository(self.session).add_one(user_dict)
         return user
 
     async def get_user_by_email(self, email: str) -> User | None:
@@ -147,6 +148,7 @@ class UserDAO:
                 .values(**user_data)
             )
             await self.session.commit()
+            invalidate_user(user_id)
             return await self.get_user_by_id(user_id)
         except DBAPIError as e:
             await self.session.rollback()
@@ -0,0 +1,143 @@
+"""Cold-start latency of main:app with and without the lifespan warm-up.
+
+    python -m benchmarks.coldstart
+    python -m benchmarks.coldstart --restarts 10 --burst 50
+    python -m benchmarks.coldstart --dsn postgresql://postgres@localhost:5432/postgres
+
+The database is prepared like in benchmarks.run. Then the app is restarted --restarts times with
+WARMUP_ENABLED off and on. Each time the report records how long the worker takes to accept connections,
+the latency of its very first request to every read route, and the p95 of a concurrent burst that follows.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from config import settings
+from .postgres import LocalPostgres, ScratchDatabase, get_free_port
+from .run import ROOT, start_app
+from .scenarios import SCENARIOS, BenchContext, login_pool, ensure_started, run_requests
+from .seed import SeedSizes, seed
+from .stats import percentile
+
+
+ROUTES = ("filters", "get_grid", "results")
+
+
+async def wait_for_port(port: int, app: subprocess.Popen, timeout: float = 60) -> None:
+    """uvicorn binds the socket once the lifespan start-up is done"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if app.poll() is not None:
+            raise RuntimeError(f"main:app exited with code {app.returncode}")
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        await asyncio.sleep(0.01)
+    raise RuntimeError("main:app did not start in time")
+
+
+async def measure_start(ctx: BenchContext, env: dict[str, str], burst: int, concurrency: int) -> dict[str, float]:
+    port = get_free_port()
+    started = time.perf_counter()
+    app = start_app(env, port, workers=1)
+    try:
+        await wait_for_port(port, app)
+        sample = {"boot_ms": (time.perf_counter() - started) * 1000}
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            ctx.client = client
+            for name in ROUTES:
+                request, = await SCENARIOS[name](ctx, 1)
+                started = time.perf_counter()
+                response = await client.request(request.method, request.url, json=request.json,
+                                                params=request.params, headers=ctx.headers(request.token))
+                response.raise_for_status()
+                sample[f"{name}_first_ms"] = (time.perf_counter() - started) * 1000
+            requests = [request for name in ROUTES for request in await SCENARIOS[name](ctx, burst // len(ROUTES))]
+            ctx.rd.shuffle(requests)
+            result = await run_requests(ctx, "burst", requests, concurrency)
+            sample["burst_p95_ms"] = percentile(sorted(result.latencies), 95) * 1000
+        return sample
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+
+
+async def benchmark(args: argparse.Namespace, database: ScratchDatabase) -> dict[str, list[dict]]:
+    rd = random.Random(args.seed)
+    env = {**os.environ, **database.app_env, "BCRYPT_ROUNDS": str(args.bcrypt_rounds)}
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True)
+    data = await seed(database.app_dsn, SeedSizes(users=200, sports=5, tournaments=2_000, open_tournaments=1,
+                                                  ready_tournaments=5, players=args.players),
+                      args.bcrypt_rounds, rd)
+
+    # tokens and running tournaments for the measured starts, made by an app that isn't measured
+    port = get_free_port()
+    app = start_app(env, port, workers=1)
+    try:
+        await wait_for_port(port, app)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            ctx = BenchContext(client=client, dsn=database.dsn, seed=data, rd=rd)
+            await login_pool(ctx, 0, 1)
+            await ensure_started(ctx)
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+
+    samples = {}
+    for mode, enabled in (("cold", "false"), ("warmed up", "true")):
+        samples[mode] = []
+        for _ in range(args.restarts):
+            samples[mode].append(await measure_start(ctx, {**env, "WARMUP_ENABLED": enabled},
+                                                     args.burst, args.concurrency))
+        print(f"{mode}: {args.restarts} starts")
+    return samples
+
+
+def print_report(samples: dict[str, list[dict]]) -> None:
+    columns = list(next(iter(samples.values()))[0])
+    header = f"{'start':<12}" + "".join(f"{column:>20}" for column in columns)
+    print(header)
+    print("-" * len(header))
+    for mode, runs in samples.items():
+        # the median of the restarts, single starts are noisy
+        cells = [percentile(sorted(run[column] for run in runs), 50) for column in columns]
+        print(f"{mode:<12}" + "".join(f"{cell:>20.1f}" for cell in cells))
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="admin DSN of an existing server instead of a throwaway cluster")
+    parser.add_argument("--restarts", type=int, default=5, help="starts measured per mode")
+    parser.add_argument("--burst", type=int, default=30, help="requests sent right after the first ones")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--players", type=int, default=64, help="players per started tournament, a power of 2")
+    parser.add_argument("--bcrypt-rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cluster = None if args.dsn else LocalPostgres()
+    try:
+        database = ScratchDatabase(args.dsn or cluster.start())
+        await database.create()
+        try:
+            samples = await benchmark(args, database)
+        finally:
+            await database.drop()
+    finally:
+        if cluster:
+            cluster.stop()
+
+    print()
+    print_report(samples)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,188 @@
+"""A throwaway Postgres cluster for the benchmarks, or a scratch database on a server given by --dsn"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncpg
+
+
+APP_ROLE = "office_tournament_bench"
+APP_PASSWORD = "office_tournament_bench"
+
+SERVER_OPTIONS = (
+    "-c listen_addresses=127.0.0.1",
+    "-c shared_preload_libraries=pg_stat_statements",
+    # BEGIN / COMMIT are not counted as queries
+    "-c pg_stat_statements.track_utility=off",
+    "-c max_connections=300",
+)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def find_pg_binary(name: str) -> str:
+    path = shutil.which(name)
+    if path:
+        return path
+    try:
+        bindir = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        bindir = ""
+    path = os.path.join(bindir, name)
+    if bindir and os.path.exists(path):
+        return path
+    raise RuntimeError(f"{name} was not found, install the PostgreSQL server or pass --dsn")
+
+
+class LocalPostgres:
+    """initdb + pg_ctl in a temporary directory, removed on stop"""
+
+    def __init__(self):
+        self.port = get_free_port()
+        self.directory = tempfile.mkdtemp(prefix="office-tournament-bench-")
+        self.data = os.path.join(self.directory, "data")
+
+    @property
+    def dsn(self) -> str:
+        return f"postgresql://postgres@127.0.0.1:{self.port}/postgres"
+
+    def start(self) -> str:
+        subprocess.run([find_pg_binary("initdb"), "-D", self.data, "-U", "postgres", "--auth=trust", "-E", "UTF8"],
+                       check=True, stdout=subprocess.DEVNULL)
+        options = " ".join((f"-p {self.port}", f"-k {self.directory}", *SERVER_OPTIONS))
+        subprocess.run([find_pg_binary("pg_ctl"), "-D", self.data, "-l", os.path.join(self.directory, "postgres.log"),
+                        "-o", options, "-w", "start"], check=True, stdout=subprocess.DEVNULL)
+        return self.dsn
+
+    def stop(self) -> None:
+        if os.path.exists(os.path.join(self.data, "postmaster.pid")):
+            subprocess.run([find_pg_binary("pg_ctl"), "-D", self.data, "-m", "fast", "-w", "stop"],
+                           check=False, stdout=subprocess.DEVNULL)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class LocalReplica:
+    """A streaming replica of a LocalPostgres made with pg_basebackup, its data directory goes with the primary's"""
+
+    def __init__(self, primary: LocalPostgres):
+        self.primary = primary
+        self.port = get_free_port()
+        self.data = os.path.join(primary.directory, "replica")
+
+    @property
+    def dsn(self) -> str:
+        return f"postgresql://postgres@127.0.0.1:{self.port}/postgres"
+
+    def start(self) -> str:
+        # -R writes standby.signal and primary_conninfo, -X stream keeps the WAL needed meanwhile
+        subprocess.run([find_pg_binary("pg_basebackup"), "-h", "127.0.0.1", "-p", str(self.primary.port),
+                        "-U", "postgres", "-D", self.data, "-R", "-X", "stream"], check=True, stdout=subprocess.DEVNULL)
+        options = " ".join((f"-p {self.port}", f"-k {self.primary.directory}", *SERVER_OPTIONS))
+        subprocess.run([find_pg_binary("pg_ctl"), "-D", self.data,
+                        "-l", os.path.join(self.primary.directory, "replica.log"), "-o", options, "-w", "start"],
+                       check=True, stdout=subprocess.DEVNULL)
+        return self.dsn
+
+    def stop(self) -> None:
+        if os.path.exists(os.path.join(self.data, "postmaster.pid")):
+            subprocess.run([find_pg_binary("pg_ctl"), "-D", self.data, "-m", "fast", "-w", "stop"],
+                           check=False, stdout=subprocess.DEVNULL)
+
+
+class ScratchDatabase:
+    """A uniquely named database owned by its own role, so the app's queries can be told apart in
+    pg_stat_statements from the harness's"""
+
+    def __init__(self, admin_dsn: str):
+        self.admin_dsn = admin_dsn
+        self.name = f"bench_{uuid.uuid4().hex[:8]}"
+        url = urlsplit(admin_dsn)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 5432
+
+    @property
+    def app_env(self) -> dict[str, str]:
+        """Settings for main:app and alembic, environment variables take precedence over .env"""
+        return {
+            "DB_HOST": self.host,
+            "DB_PORT": str(self.port),
+            "DB_NAME": self.name,
+            "DB_USER": APP_ROLE,
+            "DB_PASS": APP_PASSWORD,
+        }
+
+    @property
+    def app_dsn(self) -> str:
+        return f"postgresql://{APP_ROLE}:{APP_PASSWORD}@{self.host}:{self.port}/{self.name}"
+
+    @property
+    def dsn(self) -> str:
+        """The admin connection to the scratch database"""
+        return urlunsplit(urlsplit(self.admin_dsn)._replace(path=f"/{self.name}"))
+
+    async def create(self) -> None:
+        connection = await asyncpg.connect(self.admin_dsn)
+        try:
+            if not await connection.fetchval("SELECT 1 FROM pg_roles WHERE rolname = $1", APP_ROLE):
+                await connection.execute(f"CREATE ROLE {APP_ROLE} LOGIN PASSWORD '{APP_PASSWORD}'")
+            await connection.execute(f"CREATE DATABASE {self.name} OWNER {APP_ROLE}")
+        finally:
+            await connection.close()
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            await connection.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements")
+        except asyncpg.PostgresError:
+            pass
+        finally:
+            await connection.close()
+
+    async def drop(self) -> None:
+        connection = await asyncpg.connect(self.admin_dsn)
+        try:
+            await connection.execute(f"DROP DATABASE IF EXISTS {self.name} WITH (FORCE)")
+        finally:
+            await connection.close()
+
+
+class QueryCounter:
+    """Counts the statements main:app ran, from pg_stat_statements of the primary and the replica if there is
+    one. None when the extension isn't loaded"""
+
+    def __init__(self, database: ScratchDatabase, replica_dsn: str | None = None):
+        self.dsns = [database.dsn]
+        if replica_dsn is not None:
+            self.dsns.append(urlunsplit(urlsplit(replica_dsn)._replace(path=f"/{database.name}")))
+
+    async def _fetch(self, dsn: str, query: str, *args):
+        connection = await asyncpg.connect(dsn)
+        try:
+            return await connection.fetchval(query, *args)
+        except asyncpg.PostgresError:
+            return None
+        finally:
+            await connection.close()
+
+    async def reset(self) -> None:
+        for dsn in self.dsns:
+            await self._fetch(dsn, "SELECT pg_stat_statements_reset()")
+
+    async def count(self) -> int | None:
+        counts = [await self._count(dsn) for dsn in self.dsns]
+        return None if None in counts else sum(counts)
+
+    async def _count(self, dsn: str) -> int | None:
+        return await self._fetch(dsn, """
+            SELECT coalesce(sum(calls), 0)::bigint
+            FROM pg_stat_statements
+            JOIN pg_roles ON pg_roles.oid = pg_stat_statements.userid
+            WHERE pg_roles.rolname = $1
+              AND pg_stat_statements.dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+        """, APP_ROLE)
@@ -0,0 +1,174 @@
+"""End-to-end HTTP benchmarks of main:app against a throwaway Postgres.
+
+    python -m benchmarks.run                         # run everything, compare with the baseline if there is one
+    python -m benchmarks.run --save-baseline         # store this run as the baseline
+    python -m benchmarks.run --scenarios filters,get_grid --requests 2000 --concurrency 50
+    python -m benchmarks.run --dsn postgresql://postgres@localhost:5432/postgres
+    python -m benchmarks.run --replica               # read-only routes read from a streaming replica
+
+Without --dsn a cluster is created with initdb / pg_ctl from PATH (or pg_config --bindir) and removed
+afterwards. With --dsn a scratch database is created on that server and dropped afterwards, the server
+needs shared_preload_libraries=pg_stat_statements for the queries per request column. --replica adds a
+second cluster streaming from the throwaway one, the app gets it as DB_REPLICA_HOST / DB_REPLICA_PORT and
+queries are counted on both. Pausing replay on it (SELECT pg_wal_replay_pause()) past DB_REPLICA_MAX_LAG
+moves the reads back to the primary.
+
+The schema is built with alembic, users, sports and tournaments are copied in directly, then main:app is
+started with uvicorn and every scenario is replayed by --concurrency async clients. Baselines are JSON
+files under benchmarks/baselines, commit them to see regressions between commits.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from config import settings
+from .postgres import LocalPostgres, LocalReplica, ScratchDatabase, QueryCounter, get_free_port
+from .scenarios import SCENARIOS, BenchContext, login_pool, run_requests
+from .seed import SeedSizes, seed
+from .stats import print_report, load_baseline, save_baseline, find_regressions
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="admin DSN of an existing server instead of a throwaway cluster")
+    parser.add_argument("--replica", action="store_true", help="serve reads from a streaming replica")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated, in this order")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--sports", type=int, default=10)
+    parser.add_argument("--tournaments", type=int, default=10_000, help="tournaments for the listings")
+    parser.add_argument("--open-tournaments", type=int, default=10, help="tournaments to enroll into")
+    parser.add_argument("--ready-tournaments", type=int, default=50, help="full tournaments to start")
+    parser.add_argument("--players", type=int, default=16, help="players per started tournament, a power of 2")
+    parser.add_argument("--token-pool", type=int, default=100, help="users logged in for authenticated scenarios")
+    parser.add_argument("--bcrypt-rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the data and the request mix")
+    parser.add_argument("--baseline", default=os.path.join(ROOT, "benchmarks", "baselines", "default.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change before a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 on a regression")
+    args = parser.parse_args()
+
+    args.scenarios = args.scenarios.split(",")
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.replica and args.dsn:
+        parser.error("--replica needs the throwaway cluster, it can't be combined with --dsn")
+    if args.players < 2 or args.players & (args.players - 1):
+        parser.error("--players must be a power of 2")
+    if args.users <= max(args.players, args.token_pool):
+        parser.error("--users must be larger than --players and --token-pool")
+    return args
+
+
+def start_app(env: dict[str, str], port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env)
+
+
+async def wait_for_app(client: httpx.AsyncClient, app: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if app.poll() is not None:
+            raise RuntimeError(f"main:app exited with code {app.returncode}")
+        try:
+            if (await client.get("/openapi.json")).is_success:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("main:app did not start in time")
+
+
+async def benchmark(args: argparse.Namespace, database: ScratchDatabase,
+                    replica: LocalReplica | None = None) -> dict[str, dict]:
+    rd = random.Random(args.seed)
+    env = {**os.environ, **database.app_env, "BCRYPT_ROUNDS": str(args.bcrypt_rounds)}
+    if replica:
+        env.update(DB_REPLICA_HOST="127.0.0.1", DB_REPLICA_PORT=str(replica.port))
+
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True)
+    sizes = SeedSizes(users=args.users, sports=args.sports, tournaments=args.tournaments,
+                      open_tournaments=args.open_tournaments, ready_tournaments=args.ready_tournaments,
+                      players=args.players)
+    print(f"seeding {sizes}")
+    data = await seed(database.app_dsn, sizes, args.bcrypt_rounds, rd)
+
+    port = get_free_port()
+    app = start_app(env, port, args.workers)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_for_app(client, app)
+            ctx = BenchContext(client=client, dsn=database.dsn, seed=data, rd=rd)
+            await login_pool(ctx, args.token_pool, args.concurrency)
+
+            counter = QueryCounter(database, replica and replica.dsn)
+            summaries = {}
+            for name in args.scenarios:
+                requests = await SCENARIOS[name](ctx, args.requests)
+                await counter.reset()
+                result = await run_requests(ctx, name, requests, args.concurrency)
+                result.queries = await counter.count()
+                summaries[name] = result.summary()
+                print(f"{name}: {result.requests} requests in {result.elapsed:.1f}s")
+            return summaries
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+
+
+async def main() -> int:
+    args = parse_args()
+    cluster = None if args.dsn else LocalPostgres()
+    replica = LocalReplica(cluster) if args.replica else None
+    try:
+        admin_dsn = args.dsn or cluster.start()
+        if replica:
+            replica.start()
+        database = ScratchDatabase(admin_dsn)
+        await database.create()
+        try:
+            summaries = await benchmark(args, database, replica)
+        finally:
+            await database.drop()
+    finally:
+        if replica:
+            replica.stop()
+        if cluster:
+            cluster.stop()
+
+    baseline = load_baseline(args.baseline)
+    print()
+    print_report(summaries, baseline and baseline["scenarios"])
+    if baseline:
+        print(f"\ncompared with {args.baseline} (commit {baseline['commit']}, {baseline['created_at']})")
+    if args.save_baseline:
+        parameters = {key: value for key, value in vars(args).items()
+                      if key not in ("dsn", "baseline", "save_baseline", "fail_on_regression", "tolerance")}
+        save_baseline(args.baseline, summaries, parameters)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(summaries, baseline["scenarios"], args.tolerance) if baseline else []
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
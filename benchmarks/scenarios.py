@@ -0,0 +1,178 @@
+"""The measured requests. Each scenario prepares its requests up front, unmeasured, and the driver
+replays them with concurrent clients"""
+import asyncio
+import itertools
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import asyncpg
+import httpx
+
+from tournaments.models.utils import TournamentStatusENUM as TS
+from .seed import Seed, PASSWORD
+from .stats import ScenarioResult
+
+
+@dataclass
+class BenchRequest:
+    method: str
+    url: str
+    json: dict | None = None
+    params: dict | None = None
+    token: str | None = None
+
+
+@dataclass
+class BenchContext:
+    client: httpx.AsyncClient
+    dsn: str
+    seed: Seed
+    rd: random.Random
+    tokens: dict[uuid.UUID, str] = field(default_factory=dict)
+    started: list[uuid.UUID] = field(default_factory=list)
+
+    def headers(self, token: str | None) -> dict:
+        return {"Authorization": token} if token else {}
+
+    @property
+    def admin_token(self) -> str:
+        return self.tokens[self.seed.admin_id]
+
+    async def fetch(self, query: str, *args) -> list:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            return await connection.fetch(query, *args)
+        finally:
+            await connection.close()
+
+
+async def login(ctx: BenchContext, email: str) -> str:
+    response = await ctx.client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["result"]["access_token"]
+
+
+async def login_pool(ctx: BenchContext, size: int, concurrency: int) -> None:
+    """Tokens for the admin and size more users, shared by the authenticated scenarios"""
+    users = ctx.seed.users[:size + 1]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login_user(user_id: uuid.UUID, email: str) -> None:
+        async with semaphore:
+            ctx.tokens[user_id] = await login(ctx, email)
+
+    await asyncio.gather(*(login_user(user_id, email) for user_id, email in users))
+
+
+async def ensure_started(ctx: BenchContext) -> None:
+    """get_grid, end_match and results need running tournaments, even when start itself isn't measured"""
+    if ctx.started:
+        return
+    for tournament_id in ctx.seed.ready_tournaments:
+        response = await ctx.client.get(f"/tournament/{tournament_id}/start", headers=ctx.headers(ctx.admin_token))
+        response.raise_for_status()
+        ctx.started.append(tournament_id)
+
+
+async def prepare_login(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    return [BenchRequest("POST", "/auth/login", json={"email": email, "password": PASSWORD})
+            for _, email in (ctx.rd.choice(ctx.seed.users) for _ in range(count))]
+
+
+async def prepare_filters(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    now = datetime.now(timezone.utc)
+
+    def get_filters() -> dict:
+        kind = ctx.rd.randrange(4)
+        if kind == 0:
+            return {}
+        if kind == 1:
+            return {"status": [ctx.rd.choice([TS.REGISTRATION_OPEN, TS.PROGRESS]).value]}
+        if kind == 2:
+            return {"sport_id": str(ctx.rd.choice(ctx.seed.sports))}
+        start = now + timedelta(days=ctx.rd.randint(-180, 150))
+        return {"start_time_from": start.isoformat(), "start_time_to": (start + timedelta(days=30)).isoformat()}
+
+    return [BenchRequest("POST", "/tournament/filters", json=get_filters(),
+                         params={"size": 20, "page": ctx.rd.randint(1, 5)})
+            for _ in range(count)]
+
+
+async def prepare_enroll(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    """Every pooled user enrolls once into every open tournament, so each request is a real enrollment"""
+    players = [(user_id, token) for user_id, token in ctx.tokens.items() if user_id != ctx.seed.admin_id]
+    pairs = list(itertools.product(ctx.seed.open_tournaments, players))
+    ctx.rd.shuffle(pairs)
+    return [BenchRequest("POST", f"/user-actions/{tournament_id}/enroll", token=token)
+            for tournament_id, (_, token) in pairs[:count]]
+
+
+async def prepare_start(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    tournaments = ctx.seed.ready_tournaments[:count]
+    ctx.started = list(tournaments)
+    return [BenchRequest("GET", f"/tournament/{tournament_id}/start", token=ctx.admin_token)
+            for tournament_id in tournaments]
+
+
+async def prepare_get_grid(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    await ensure_started(ctx)
+    return [BenchRequest("GET", f"/grid/{ctx.rd.choice(ctx.started)}", token=ctx.admin_token) for _ in range(count)]
+
+
+async def prepare_end_match(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    """First round matches are the ones that have both players, each is ended once"""
+    await ensure_started(ctx)
+    rows = await ctx.fetch("""
+        SELECT match.id FROM match
+        JOIN round ON round.id = match.round_id
+        JOIN tournament ON tournament.grid = round.grid_id
+        WHERE tournament.id = ANY($1::uuid[]) AND round.round_number = 1
+    """, ctx.started)
+    match_ids = [row["id"] for row in rows]
+    ctx.rd.shuffle(match_ids)
+    return [BenchRequest("GET", f"/grid/match/{match_id}/end", token=ctx.admin_token) for match_id in match_ids[:count]]
+
+
+async def prepare_results(ctx: BenchContext, count: int) -> list[BenchRequest]:
+    await ensure_started(ctx)
+    return [BenchRequest("GET", f"/grid/{ctx.rd.choice(ctx.started)}/results", token=ctx.admin_token)
+            for _ in range(count)]
+
+
+SCENARIOS: dict[str, Callable[[BenchContext, int], Awaitable[list[BenchRequest]]]] = {
+    "login": prepare_login,
+    "filters": prepare_filters,
+    "enroll": prepare_enroll,
+    "start": prepare_start,
+    "get_grid": prepare_get_grid,
+    "end_match": prepare_end_match,
+    "results": prepare_results,
+}
+
+
+async def run_requests(ctx: BenchContext, name: str, requests: list[BenchRequest], concurrency: int) -> ScenarioResult:
+    """Replays the requests from concurrency clients, each taking the next one as soon as it's done"""
+    result = ScenarioResult(name=name)
+    pending = iter(requests)
+
+    async def client() -> None:
+        for request in pending:
+            started = time.perf_counter()
+            try:
+                response = await ctx.client.request(request.method, request.url, json=request.json,
+                                                    params=request.params, headers=ctx.headers(request.token))
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            result.latencies.append(time.perf_counter() - started)
+            if not ok:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,159 @@
+"""In-process benchmark of building and rendering large responses, no database needed.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --repeat 50
+
+Every payload is built from row-like objects the way the handlers get them from SQLAlchemy, then served
+three ways: models validated object by object through FastAPI's response model and JSONResponse (the old
+path), the same with ORJSONResponse (the default for routes without a fast path), and the handlers' fast
+path, constructed models or a single validation from the root rendered by utils.serialization.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from grid_generator.models.schemas import BasicMatchSchema, GridSchema, GridSchemaWrapped, GridUserSchema, \
+    RoundSchema
+from grid_generator.services.grid import get_match_data
+from tournaments.models.schemas import GetTournamentSchemaWithSportTitle, TournamentResponse
+from tournaments.models.utils import GridTypeENUM, TournamentStatusENUM
+from utils.serialization import from_row, json_response
+from .stats import percentile
+
+
+def make_tournaments(count: int, rd: random.Random) -> list[tuple]:
+    """(Tournament, grid_type, sport_title) rows of a tournament list page"""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        tournament = SimpleNamespace(
+            id=uuid.uuid4(), title=f"Tournament {i}", description="Office tournament " * 5, sport_id=uuid.uuid4(),
+            start_time=now + timedelta(days=3), enroll_start_time=now, enroll_end_time=now + timedelta(days=2),
+            location="Meeting room", admins_id=[uuid.uuid4()], team_players_limit=1, teams_limit=32,
+            third_place_match=False, players_id=[uuid.uuid4() for _ in range(rd.randrange(32))],
+            status=TournamentStatusENUM.REGISTRATION_OPEN)
+        rows.append((tournament, GridTypeENUM.PLAYOFF, "Table tennis"))
+    return rows
+
+
+def make_grid(player_count: int, grid_type: GridTypeENUM, rd: random.Random) -> tuple[Any, list]:
+    """The grid and its match rows as MatchRepository.get_grid_matches returns them"""
+    players = [(uuid.uuid4(), f"Player {i}") for i in range(player_count)]
+    if grid_type == GridTypeENUM.PLAYOFF:
+        rounds = []
+        matches = player_count // 2
+        while matches:
+            rounds.append(matches)
+            matches //= 2
+    else:
+        rounds = [player_count // 2] * (player_count - 1)
+
+    rows = []
+    for round_number, match_count in enumerate(rounds, start=1):
+        round_id = uuid.uuid4()
+        for _ in range(match_count):
+            (first_id, first_name), (second_id, second_name) = rd.sample(players, 2)
+            rows.append(SimpleNamespace(
+                id=uuid.uuid4(), round_id=round_id, round_number=round_number, players_id=[first_id, second_id],
+                first_player_name=first_name, second_player_name=second_name,
+                score=[rd.randrange(4), rd.randrange(4)]))
+    return SimpleNamespace(id=uuid.uuid4(), grid_type=grid_type), rows
+
+
+def build_tournaments(rows: list[tuple], fast: bool) -> TournamentResponse:
+    if fast:
+        result = [from_row(GetTournamentSchemaWithSportTitle, t, grid_type=grid_type, sport_title=sport_title)
+                  for t, grid_type, sport_title in rows]
+        return TournamentResponse.model_construct(total_count=len(rows), tournaments=result, next_cursor=None)
+    result = [GetTournamentSchemaWithSportTitle(**t.__dict__, grid_type=grid_type, sport_title=sport_title)
+              for t, grid_type, sport_title in rows]
+    return TournamentResponse(total_count=len(rows), tournaments=result, next_cursor=None)
+
+
+def build_grid(grid, rows: list, fast: bool) -> GridSchemaWrapped:
+    rounds = {}
+    for m in rows:
+        _round = rounds.setdefault(m.round_id, {"id": m.round_id, "round_number": m.round_number, "matches": []})
+        if fast:
+            _round["matches"].append(get_match_data(m))
+            continue
+        players = [GridUserSchema(id=p, full_name=name)
+                   for p, name in zip(m.players_id, (m.first_player_name, m.second_player_name))]
+        _round["matches"].append(BasicMatchSchema(id=m.id, players=players, score=m.score))
+    if fast:
+        return GridSchemaWrapped.model_validate({"grid": {"id": grid.id, "grid_type": grid.grid_type,
+                                                          "rounds": list(rounds.values()), "third_place_match": None}})
+    return GridSchemaWrapped(grid=GridSchema(id=grid.id, grid_type=grid.grid_type,
+                                             rounds=[RoundSchema(**r) for r in rounds.values()],
+                                             third_place_match=None))
+
+
+def get_strategies(schema, build: Callable[[bool], Any]) -> dict[str, Callable[[], Any]]:
+    field = create_response_field(name="response", type_=schema)
+
+    async def through_response_model(response_class):
+        content = await serialize_response(field=field, response_content=build(False))
+        return response_class(content)
+
+    async def fast_path():
+        return json_response(build(True))
+
+    return {
+        "validated+JSONResponse": lambda: through_response_model(JSONResponse),
+        "validated+ORJSONResponse": lambda: through_response_model(ORJSONResponse),
+        "fast path": fast_path,
+    }
+
+
+async def measure(render: Callable[[], Any], repeat: int) -> tuple[list[float], int]:
+    body = (await render()).body
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await render()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings), len(body)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="renders of every payload per strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rd = random.Random(args.seed)
+
+    payloads = {}
+    for count in (100, 1000):
+        rows = make_tournaments(count, rd)
+        payloads[f"tournaments {count}"] = (TournamentResponse, lambda fast, rows=rows: build_tournaments(rows, fast))
+    for count, grid_type in ((256, GridTypeENUM.PLAYOFF), (64, GridTypeENUM.CIRCLE)):
+        grid, rows = make_grid(count, grid_type, rd)
+        payloads[f"{grid_type.value} {count}"] = (
+            GridSchemaWrapped, lambda fast, grid=grid, rows=rows: build_grid(grid, rows, fast))
+
+    header = f"{'payload':<18}{'strategy':<26}{'p50_ms':>10}{'p95_ms':>10}{'speedup':>10}{'bytes':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, (schema, build) in payloads.items():
+        # the old path and the new one have to render the same document
+        assert schema.model_validate_json(json_response(build(True)).body) == build(False), name
+        base = None
+        for strategy, render in get_strategies(schema, build).items():
+            timings, size = await measure(render, args.repeat)
+            p50 = percentile(timings, 50) * 1000
+            base = base or p50
+            print(f"{name:<18}{strategy:<26}{p50:>10.2f}{percentile(timings, 95) * 1000:>10.2f}"
+                  f"{base / p50:>9.1f}x{size:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""Latency summaries, the report table and baselines to compare commits against"""
+import json
+import math
+import os
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+    queries: int | None = None
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "rps": self.requests / self.elapsed if self.elapsed else 0.0,
+            "queries_per_request": self.queries / self.requests if self.queries is not None and self.requests
+            else None,
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+COLUMNS = ["requests", "errors", "p50_ms", "p95_ms", "p99_ms", "rps", "queries_per_request"]
+# a higher value of these is worse
+LOWER_IS_BETTER = {"p50_ms", "p95_ms", "p99_ms", "queries_per_request", "errors"}
+
+
+def format_value(value) -> str:
+    if value is None:
+        return "n/a"
+    if isinstance(value, float):
+        return f"{value:.1f}" if value < 1000 else f"{value:.0f}"
+    return str(value)
+
+
+def print_report(summaries: dict[str, dict], baseline: dict[str, dict] | None = None) -> None:
+    header = f"{'scenario':<12}" + "".join(f"{column:>20}" for column in COLUMNS)
+    print(header)
+    print("-" * len(header))
+    for name, summary in summaries.items():
+        before = (baseline or {}).get(name, {})
+        cells = []
+        for column in COLUMNS:
+            cell = format_value(summary[column])
+            change = get_change(before.get(column), summary[column])
+            if change is not None:
+                cell += f" ({change:+.0%})"
+            cells.append(f"{cell:>20}")
+        print(f"{name:<12}" + "".join(cells))
+
+
+def get_change(before, after) -> float | None:
+    if before is None or after is None or not before:
+        return None
+    return (after - before) / before
+
+
+def find_regressions(summaries: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """Metrics that got worse than the baseline by more than tolerance. rps counts as worse when it drops"""
+    regressions = []
+    for name, summary in summaries.items():
+        for column in ("p50_ms", "p95_ms", "p99_ms", "rps", "queries_per_request"):
+            change = get_change(baseline.get(name, {}).get(column), summary[column])
+            if change is None:
+                continue
+            worse = change > tolerance if column in LOWER_IS_BETTER else change < -tolerance
+            if worse:
+                regressions.append(f"{name}.{column}: {format_value(baseline[name][column])} -> "
+                                   f"{format_value(summary[column])} ({change:+.0%})")
+        if summary["errors"] > baseline.get(name, {}).get("errors", 0):
+            regressions.append(f"{name}.errors: {baseline.get(name, {}).get('errors', 0)} -> {summary['errors']}")
+    return regressions
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, summaries: dict[str, dict], parameters: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({
+            "commit": get_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "parameters": parameters,
+            "scenarios": summaries,
+        }, file, indent=2)
+        file.write("\n")
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +10,26 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_APPLICATION_NAME: str = "office-tournament"
+    DB_STATEMENT_TIMEOUT: int = 0  # ms, 0 disables it
+    # PgBouncer in transaction pooling mode: no prepared statement caches and only startup parameters it tracks
+    DB_PGBOUNCER: bool = False
+    # LISTEN needs a session of its own, so behind PgBouncer the live grid listener connects to Postgres directly
+    DB_DIRECT_HOST: str | None = None
+    DB_DIRECT_PORT: str | None = None
+    # optional streaming replica of the same database, read-only routes read from it while it keeps up
+    DB_REPLICA_HOST: str | None = None
+    DB_REPLICA_PORT: str | None = None
+    DB_REPLICA_MAX_LAG: float = 5  # s, reads go to the primary when the replica is further behind
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 1  # s
+    DB_REPLICA_LAG_CHECK_TIMEOUT: float = 1  # s, an unreachable replica counts as lagging
+
     SECRET: str
     VERIFY_TOKEN_SECRET: str
 
@@ -18,6 +38,29 @@ class Settings(BaseSettings):
 
     ORIGINS: List[str] = []
 
+    TIMEZONE: str = "UTC"
+
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_SIZE: int = 10_000
+
+    # brief profiles (name and avatar) shown next to players, dropped when the user updates the profile
+    PROFILE_CACHE_TTL: int = 30
+    PROFILE_CACHE_SIZE: int = 10_000
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_CONCURRENCY: int = 4
+
+    GRID_CACHE_SIZE: int = 512
+    GRID_CACHE_TTL: int = 300
+
+    LIVE_HEARTBEAT_INTERVAL: int = 15
+    LIVE_QUEUE_SIZE: int = 100
+
+    QUERY_BUDGET_MODE: Literal["off", "log", "raise"] = "off"
+
+    # open the pools and compile the hot statements before a worker accepts requests
+    WARMUP_ENABLED: bool = True
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -29,5 +72,7 @@ class AppSettings:
 
     DEFAULT_MAX_TEAMS_COUNT = 16
 
+    TOURNAMENT_COUNT_ESTIMATE_THRESHOLD = 100_000
+
 
 app_settings = AppSettings()
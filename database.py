@@ -1,15 +1,184 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-from sqlalchemy.orm import declarative_base
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
 
 from config import settings
+from utils.metrics import DB_REPLICA_LAG, instrument_engine
+from utils.queries import query_stats
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
-engine = create_async_engine(f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASS}@{settings.DB_HOST}:"
-                             f"{settings.DB_PORT}/{settings.DB_NAME}")
+DATABASE_DSN = f"postgresql://{settings.DB_USER}:{settings.DB_PASS}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+DATABASE_DIRECT_DSN = f"postgresql://{settings.DB_USER}:{settings.DB_PASS}" \
+                      f"@{settings.DB_DIRECT_HOST or settings.DB_HOST}:{settings.DB_DIRECT_PORT or settings.DB_PORT}" \
+                      f"/{settings.DB_NAME}"
+DATABASE_REPLICA_DSN = f"postgresql://{settings.DB_USER}:{settings.DB_PASS}" \
+                       f"@{settings.DB_REPLICA_HOST}:{settings.DB_REPLICA_PORT or settings.DB_PORT}" \
+                       f"/{settings.DB_NAME}" if settings.DB_REPLICA_HOST else None
+
+
+def get_connect_args() -> dict:
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_PGBOUNCER:
+        # prepared statements don't survive a server connection switch between transactions, and
+        # PgBouncer rejects startup parameters it doesn't track: set statement_timeout on the role instead
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            "server_settings": server_settings,
+        }
+    if settings.DB_STATEMENT_TIMEOUT:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT)
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": server_settings,
+    }
+
+
+def get_engine(dsn: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(
+        dsn.replace("postgresql://", "postgresql+asyncpg://", 1),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=get_connect_args(),
+    )
+    instrument_engine(engine, name)
+    return engine
+
+
+engine = get_engine(DATABASE_DSN, "primary")
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engine = get_engine(DATABASE_REPLICA_DSN, "replica") if DATABASE_REPLICA_DSN else None
+replica_session_maker = async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine else None
+
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class ReplicaMonitor:
+    """Whether the replica is close enough to the primary to read from. The lag is checked at most once per
+    DB_REPLICA_LAG_CHECK_INTERVAL, meanwhile the last result is used"""
+
+    def __init__(self, replica: AsyncEngine):
+        self.engine = replica
+        self.lag: float | None = None
+        self.checked_at = float("-inf")
+        self.lock = asyncio.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.lag is not None and self.lag <= settings.DB_REPLICA_MAX_LAG
+
+    async def is_available(self) -> bool:
+        if time.monotonic() - self.checked_at >= settings.DB_REPLICA_LAG_CHECK_INTERVAL and not self.lock.locked():
+            async with self.lock:
+                await self.check()
+        return self.available
+
+    async def fetch_lag(self):
+        async with self.engine.connect() as connection:
+            return await connection.scalar(REPLICA_LAG_QUERY)
+
+    async def check(self) -> None:
+        # not a statement of the request that happened to trigger the check
+        token = query_stats.set(None)
+        try:
+            lag = await asyncio.wait_for(self.fetch_lag(), settings.DB_REPLICA_LAG_CHECK_TIMEOUT)
+            self.lag = float(lag) if lag is not None else None
+        except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+            logger.warning("Replica lag check failed, reading from the primary", exc_info=True)
+            self.lag = None
+        finally:
+            query_stats.reset(token)
+            self.checked_at = time.monotonic()
+        if self.lag is not None:
+            DB_REPLICA_LAG.set(self.lag)
+
+
+replica_monitor = ReplicaMonitor(replica_engine) if replica_engine else None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def mark_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def mark_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+
+def fence_replica(session: AsyncSession, check: Callable[[AsyncSession], Awaitable[bool]]) -> None:
+    """The unit of work reads from the replica only if check passes on it, typically that the replica has
+    replayed a write the primary has already reported. Other requests' writes are invisible to has_writes,
+    so this is how a client refetching after an event avoids the state from before it"""
+    session.info["replica_fence"] = check
+
+
+async def get_replica_session(session: AsyncSession | None) -> AsyncSession | None:
+    """The replica session of a read-only unit of work, None when its reads have to go to the primary:
+    the replica isn't configured or lags, the unit of work has written something it may read back, or
+    the replica fails its fence"""
+    if replica_monitor is None or session is None or not session.info.get("replica_reads") \
+            or session.info.get("has_writes") or not await replica_monitor.is_available():
+        return None
+    if "replica_session" not in session.info:
+        replica = replica_session_maker()
+        session.info["replica_session"] = replica
+        fence = session.info.get("replica_fence")
+        if fence is not None:
+            try:
+                passed = await fence(replica)
+            except (OSError, SQLAlchemyError):
+                logger.warning("Replica fence check failed, reading from the primary", exc_info=True)
+                passed = False
+            if not passed:
+                # the whole unit of work stays on the primary, its reads have to agree with each other
+                session.info["replica_reads"] = False
+                return None
+    return session.info["replica_session"]
+
 
 async def get_async_session():
+    """Request-scoped unit of work: one session and one transaction, committed when the request succeeds"""
     async with async_session_maker() as session:
-        yield session
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def get_read_session():
+    """Unit of work of read-only routes: repository reads may be served by the replica, everything else
+    still goes to the primary"""
+    async with async_session_maker(info={"replica_reads": True}) as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            if "replica_session" in session.info:
+                await session.info["replica_session"].close()
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, UUID, ARRAY, Integer, ForeignKey
+from sqlalchemy import Column, UUID, ARRAY, Integer, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import mapped_column
 
 from database import Base
@@ -15,6 +15,10 @@ class Round(Base):
     game_count = Column(Integer, nullable=False)
     grid_id = mapped_column(ForeignKey(Grid.id, ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
 
+    __table_args__ = (
+        Index('ix_round_grid_id_round_number', grid_id, round_number),
+    )
+
 
 class Match(Base):
     __tablename__ = 'match'
@@ -26,6 +30,19 @@ class Match(Base):
     players_id = Column(ARRAY(UUID), nullable=False)
     score = Column(ARRAY(Integer), nullable=False)
     winner_id = Column(UUID(as_uuid=True), nullable=True)
+    # playoff topology: where the winner (and for semifinals the loser) goes, slot is the players_id index
+    next_match_id = mapped_column(ForeignKey('match.id', ondelete='SET NULL', deferrable=True, initially='DEFERRED'),
+                                  nullable=True)
+    next_match_slot = Column(Integer, nullable=True)
+    loser_match_id = mapped_column(ForeignKey('match.id', ondelete='SET NULL', deferrable=True, initially='DEFERRED'),
+                                   nullable=True)
+    loser_match_slot = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('ix_match_round_id_grid_match_number', round_id, grid_match_number),
+        Index('ix_match_round_id_queue_match_number_unplayed', round_id, queue_match_number,
+              postgresql_where=winner_id.is_(None)),
+    )
 
 
 class Game(Base):
@@ -35,3 +52,26 @@ class Game(Base):
     match_id = mapped_column(ForeignKey(Match.id, ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
     game_number = Column(Integer, nullable=False)
     score = Column(ARRAY(Integer), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(match_id, game_number, name='uq_game_match_id_game_number'),
+    )
+
+
+class Standing(Base):
+    __tablename__ = 'standing'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    grid_id = mapped_column(ForeignKey(Grid.id, ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
+    player_id = Column(UUID(as_uuid=True), nullable=False)
+    points = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    draws = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    # the range of places the player can still finish in, a single place once it's decided
+    place_from = Column(Integer, nullable=False)
+    place_to = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(grid_id, player_id, name='uq_standing_grid_id_player_id'),
+    )
@@ -62,8 +62,9 @@ class ResultsSchema(BaseModel):
 
 
 class SetGameCountSchema(BaseModel):
-    game_count: int
+    game_count: int = Field(ge=1)
 
 
 class QueueSchema(BaseModel):
     matches: List[BasicMatchSchema]
+    next_cursor: Optional[str] = None
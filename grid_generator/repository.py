@@ -1,41 +1,339 @@
+import json
 import uuid
 
+from sqlalchemy import insert, update, select, delete, func, literal_column, case, true, and_, not_, any_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, array
+from sqlalchemy.orm import aliased
+
+from auth.models.db import User
 from config import app_settings
 
 from utils.repository import SQLALchemyRepository
-from grid_generator.models.db import Round, Match, Game
+from grid_generator.models.db import Round, Match, Game, Standing
+from tournaments.models.db import Tournament, Grid
+from tournaments.models.utils import TournamentStatusENUM, GridTypeENUM
+
+
+GRID_EVENTS_CHANNEL = "grid_events"
+
+
+class GridItemRepository(SQLALchemyRepository):
+    async def update_grid_version(self, *conditions) -> uuid.UUID | None:
+        """Bumps the version of the grid reached through conditions, which invalidates its cached snapshots"""
+        async with self.get_session() as session:
+            stmt = update(Grid).where(*conditions).values(version=Grid.version + 1).returning(Grid.id)\
+                .execution_options(synchronize_session=False)
+            result = await session.execute(stmt)
+            await self.commit(session)
+            return result.scalar_one_or_none()
 
+    async def publish_grid_event(self, grid_id: uuid.UUID, event: dict) -> None:
+        """NOTIFY is transactional, so listeners receive the event only once the write commits"""
+        payload = json.dumps({**event, "grid_id": grid_id}, default=str)
+        async with self.get_session() as session:
+            await session.execute(select(func.pg_notify(GRID_EVENTS_CHANNEL, payload)))
+            await self.commit(session)
 
-class RoundRepository(SQLALchemyRepository):
+
+class RoundRepository(GridItemRepository):
     model = Round
 
-    def add_round(self, round_number: int, grid_id: uuid.UUID):
-        return self.add_one(data={
+    @staticmethod
+    def round_data(round_number: int, grid_id: uuid.UUID) -> dict:
+        return {
+            "id": uuid.uuid4(),
             "round_number": round_number,
             "game_count": app_settings.DEFAULT_GAME_COUNT,
-            "grid_id": grid_id})
+            "grid_id": grid_id}
+
+    def add_round(self, round_number: int, grid_id: uuid.UUID):
+        return self.add_one(data=self.round_data(round_number, grid_id))
+
+    def bump_grid_version(self, round_id: uuid.UUID):
+        return self.update_grid_version(self.model.id == round_id, Grid.id == self.model.grid_id)
 
 
-class MatchRepository(SQLALchemyRepository):
+class MatchRepository(GridItemRepository):
     model = Match
 
-    def add_round_match(self, round_id, grid_number=0, queue_number=0, players=None):
+    @staticmethod
+    def match_data(round_id, grid_number=0, queue_number=0, players=None) -> dict:
         players = players or [None, None]
-        return self.add_one(data={
+        return {
+            "id": uuid.uuid4(),
             "grid_match_number": grid_number,
             "queue_match_number": queue_number,
             "round_id": round_id,
             "players_id": players,
-            "score": [0, 0]
-        })
+            "score": [0, 0],
+            "next_match_id": None,
+            "next_match_slot": None,
+            "loser_match_id": None,
+            "loser_match_slot": None
+        }
+
+    def add_round_match(self, round_id, grid_number=0, queue_number=0, players=None):
+        return self.add_one(data=self.match_data(round_id, grid_number, queue_number, players))
+
+    def bump_grid_version(self, match_id: uuid.UUID):
+        return self.update_grid_version(self.model.id == match_id, Round.id == self.model.round_id,
+                                        Grid.id == Round.grid_id)
+
+    def advance_player(self, match_id, slot, player_id, name: str):
+        """Puts player_id into the given players_id slot of the match the finished one points to"""
+        players_id = case((slot == 0, array([player_id, self.model.players_id[2]])),
+                          else_=array([self.model.players_id[1], player_id]))
+        return update(self.model)\
+            .where(self.model.id == match_id)\
+            .values(players_id=players_id)\
+            .returning(self.model.id, self.model.players_id)\
+            .cte(name)
+
+    async def finish_match(self, match_id: uuid.UUID):
+        """Records the winner and moves both players on along the stored topology, in a single statement.
+        Returns None when the match doesn't exist, doesn't have both players yet or a match its players
+        moved on to has been played, as changing its winner then would rewrite a finished match"""
+        async with self.get_session() as session:
+            first_won = self.model.score[1] >= self.model.score[2]
+            following = aliased(self.model)
+            following_played = select(following.id)\
+                .where(following.id.in_([self.model.next_match_id, self.model.loser_match_id]),
+                       following.winner_id.isnot(None))\
+                .exists()
+            finished = update(self.model)\
+                .where(self.model.id == match_id,
+                       self.model.players_id[1].isnot(None), self.model.players_id[2].isnot(None),
+                       not_(following_played))\
+                .values(winner_id=case((first_won, self.model.players_id[1]), else_=self.model.players_id[2]))\
+                .returning(self.model.winner_id,
+                           case((first_won, self.model.players_id[2]), else_=self.model.players_id[1]).label("loser_id"),
+                           self.model.next_match_id, self.model.next_match_slot,
+                           self.model.loser_match_id, self.model.loser_match_slot)\
+                .cte("finished")
+            winner_match = self.advance_player(finished.c.next_match_id, finished.c.next_match_slot,
+                                               finished.c.winner_id, "winner_match")
+            loser_match = self.advance_player(finished.c.loser_match_id, finished.c.loser_match_slot,
+                                              finished.c.loser_id, "loser_match")
+            query = select(finished.c.winner_id,
+                           winner_match.c.id.label("next_match_id"),
+                           winner_match.c.players_id.label("next_players_id"),
+                           loser_match.c.id.label("loser_match_id"),
+                           loser_match.c.players_id.label("loser_players_id"))\
+                .select_from(finished)\
+                .outerjoin(winner_match, true())\
+                .outerjoin(loser_match, true())
+            result = await session.execute(query)
+            await self.commit(session)
+            return result.one_or_none()
+
+    def get_matches_query(self):
+        """Matches with their round and both players' names, joined in a single select"""
+        first_player, second_player = aliased(User), aliased(User)
+        return select(self.model.id, self.model.players_id, self.model.score, self.model.winner_id,
+                      self.model.grid_match_number, self.model.queue_match_number,
+                      Round.id.label("round_id"), Round.round_number,
+                      first_player.full_name.label("first_player_name"),
+                      second_player.full_name.label("second_player_name"))\
+            .join(Round, Round.id == self.model.round_id)\
+            .outerjoin(first_player, first_player.id == self.model.players_id[1])\
+            .outerjoin(second_player, second_player.id == self.model.players_id[2])
+
+    async def get_grid_matches(self, grid_id: uuid.UUID):
+        async with self.read_session() as session:
+            # the third place round (number 0) goes last, as it is shown after the final
+            query = self.get_matches_query()\
+                .where(Round.grid_id == grid_id)\
+                .order_by(Round.round_number == 0, Round.round_number, self.model.grid_match_number)
+            result = await session.execute(query)
+            return result.all()
+
 
+    async def get_queue_matches(self, grid_id: uuid.UUID, limit: int | None = None,
+                                after: tuple[int, uuid.UUID] | None = None, unplayed: bool = False):
+        """The grid's matches in queue order, from after on. Unplayed ones are served by a partial index"""
+        async with self.read_session() as session:
+            query = self.get_matches_query().where(Round.grid_id == grid_id)
+            if unplayed:
+                query = query.where(self.model.winner_id.is_(None))
+            if after:
+                query = query.where(tuple_(self.model.queue_match_number, self.model.id) > tuple_(*after))
+            query = query.order_by(self.model.queue_match_number, self.model.id).limit(limit)
+            result = await session.execute(query)
+            return result.all()
 
-class GameRepository(SQLALchemyRepository):
+
+class GameRepository(GridItemRepository):
     model = Game
 
-    def add_match_game(self, match_id: uuid.UUID, game_number: int):
-        return self.add_one(data={
+    @staticmethod
+    def game_data(match_id: uuid.UUID, game_number: int) -> dict:
+        return {
             "match_id": match_id,
             "score": [0, 0],
             "game_number": game_number
-        })
+        }
+
+    def add_match_game(self, match_id: uuid.UUID, game_number: int):
+        return self.add_one(data=self.game_data(match_id, game_number))
+
+    async def get_match_games(self, match_id: uuid.UUID):
+        async with self.read_session() as session:
+            query = select(self.model).where(self.model.match_id == match_id).order_by(self.model.game_number)
+            result = await session.execute(query)
+            return result.scalars().all()
+
+    async def resize_round_games(self, round_id: uuid.UUID, game_count: int) -> None:
+        """Brings every match of the round to exactly game_count games, in one insert and one delete"""
+        async with self.get_session() as session:
+            game_number = func.generate_series(1, game_count).table_valued("value").alias("game_number")
+            missing = select(func.gen_random_uuid(), Match.id, game_number.c.value, literal_column("ARRAY[0, 0]"))\
+                .select_from(Match).join(game_number, literal_column("true"))\
+                .where(Match.round_id == round_id)
+            await session.execute(
+                pg_insert(self.model)
+                .from_select(["id", "match_id", "game_number", "score"], missing)
+                .on_conflict_do_nothing(constraint="uq_game_match_id_game_number"))
+            await session.execute(
+                delete(self.model)
+                .where(self.model.match_id == Match.id, Match.round_id == round_id,
+                       self.model.game_number > game_count)
+                .execution_options(synchronize_session=False))
+            await self.commit(session)
+
+    def bump_grid_version(self, game_id: uuid.UUID):
+        return self.update_grid_version(self.model.id == game_id, Match.id == self.model.match_id,
+                                        Round.id == Match.round_id, Grid.id == Round.grid_id)
+
+
+class BracketRepository(SQLALchemyRepository):
+    """Writes a whole generated grid with its games and standings and starts its tournament in a single transaction."""
+    model = Match
+
+    async def add_bracket(self, tournament_id: uuid.UUID, rounds: list[dict], matches: list[dict],
+                          standings: list[dict]) -> list[uuid.UUID]:
+        async with self.get_session() as session:
+            await session.execute(insert(Round), rounds)
+            # a single executemany: without RETURNING, and on the table, as ORM bulk inserts split the rows
+            # by which of their columns are None. The ids are generated by match_data
+            await session.execute(insert(Match.__table__), matches)
+            game_counts = {r["id"]: r["game_count"] for r in rounds}
+            games = [GameRepository.game_data(m["id"], number)
+                     for m in matches for number in range(1, game_counts[m["round_id"]] + 1)]
+            if games:
+                await session.execute(insert(Game), games)
+            await session.execute(insert(Standing), standings)
+            await session.execute(
+                update(Tournament)
+                .where(Tournament.id == tournament_id)
+                .values(status=TournamentStatusENUM.PROGRESS))
+            # the queue and results snapshots cached before the start are empty
+            await session.execute(
+                update(Grid)
+                .where(Grid.id == Tournament.grid, Tournament.id == tournament_id)
+                .values(version=Grid.version + 1)
+                .execution_options(synchronize_session=False))
+            await self.commit(session)
+            return [m["id"] for m in matches]
+
+
+class StandingRepository(SQLALchemyRepository):
+    """Per player results of a grid, kept up to date by end_match so that reading them computes nothing"""
+    model = Standing
+
+    @staticmethod
+    def standing_data(grid_id: uuid.UUID, player_id: uuid.UUID, players_count: int) -> dict:
+        return {
+            "id": uuid.uuid4(),
+            "grid_id": grid_id,
+            "player_id": player_id,
+            "points": 0,
+            "wins": 0,
+            "draws": 0,
+            "losses": 0,
+            "place_from": 1,
+            "place_to": players_count
+        }
+
+    async def get_grid_standings(self, grid_id: uuid.UUID):
+        async with self.read_session() as session:
+            query = select(self.model, User.full_name, User.avatar_id)\
+                .join(User, User.id == self.model.player_id)\
+                .where(self.model.grid_id == grid_id)\
+                .order_by(self.model.place_from, self.model.place_to, self.model.points.desc())
+            result = await session.execute(query)
+            return result.all()
+
+    async def update_match_standings(self, match_id: uuid.UUID) -> None:
+        """Recounts the records of both players of a finished match and moves their places. Round robin
+        places rank the whole grid, so the caller has to hold the grid row lock (bump_grid_version)"""
+        async with self.get_session() as session:
+            result = await session.execute(self.get_records_query(match_id))
+            grid_id, grid_type = result.first()
+            places = self.get_playoff_places_query(match_id) if grid_type == GridTypeENUM.PLAYOFF \
+                else self.get_circle_places_query(grid_id)
+            await session.execute(places)
+            await self.commit(session)
+
+    def get_records_query(self, match_id: uuid.UUID):
+        """Wins, draws and losses are counted over the players' finished matches, so ending a match again
+        after a score correction doesn't count it twice. Draws only exist in round robin"""
+        grid_match = select(Match.players_id, Round.grid_id, Grid.grid_type)\
+            .join(Round, Round.id == Match.round_id)\
+            .join(Grid, Grid.id == Round.grid_id)\
+            .where(Match.id == match_id)\
+            .cte("grid_match")
+        player_id = self.model.player_id
+        is_draw = and_(grid_match.c.grid_type == GridTypeENUM.CIRCLE, Match.score[1] == Match.score[2])
+        records = select(self.model.id,
+                         func.count().filter(and_(Match.winner_id == player_id, not_(is_draw))).label("wins"),
+                         func.count().filter(is_draw).label("draws"),
+                         func.count().filter(and_(Match.winner_id != player_id, not_(is_draw))).label("losses"))\
+            .join(grid_match, and_(grid_match.c.grid_id == self.model.grid_id,
+                                   player_id == any_(grid_match.c.players_id)))\
+            .join(Round, Round.grid_id == self.model.grid_id)\
+            .join(Match, and_(Match.round_id == Round.id, Match.winner_id.isnot(None),
+                              player_id == any_(Match.players_id)))\
+            .group_by(self.model.id)\
+            .cte("records")
+        return update(self.model)\
+            .where(self.model.id == records.c.id, self.model.grid_id == grid_match.c.grid_id)\
+            .values(wins=records.c.wins, draws=records.c.draws, losses=records.c.losses,
+                    points=records.c.wins * 3 + records.c.draws)\
+            .returning(grid_match.c.grid_id, grid_match.c.grid_type)\
+            .execution_options(synchronize_session=False)
+
+    def get_playoff_places_query(self, match_id: uuid.UUID):
+        """Both players of a playoff match share a place range, the winner takes its better half
+        and the loser the worse one. The range is taken over both players, so it is the same
+        when the match is ended again, which finish_match only allows until the next match is played"""
+        loser_id = case((Match.winner_id == Match.players_id[1], Match.players_id[2]), else_=Match.players_id[1])
+        pair = select(Match.winner_id, loser_id.label("loser_id"), self.model.grid_id,
+                      func.min(self.model.place_from).label("place_from"),
+                      func.max(self.model.place_to).label("place_to"))\
+            .join(Round, Round.id == Match.round_id)\
+            .join(self.model, and_(self.model.grid_id == Round.grid_id, self.model.player_id == any_(Match.players_id)))\
+            .where(Match.id == match_id)\
+            .group_by(Match.id, self.model.grid_id)\
+            .cte("pair")
+        half = (pair.c.place_to - pair.c.place_from + 1) // 2
+        won = self.model.player_id == pair.c.winner_id
+        return update(self.model)\
+            .where(self.model.grid_id == pair.c.grid_id,
+                   self.model.player_id.in_([pair.c.winner_id, pair.c.loser_id]))\
+            .values(place_from=case((won, pair.c.place_from), else_=pair.c.place_from + half),
+                    place_to=case((won, pair.c.place_from + half - 1), else_=pair.c.place_to))\
+            .execution_options(synchronize_session=False)
+
+    def get_circle_places_query(self, grid_id: uuid.UUID):
+        """Round robin places follow points, players level on points share a place range"""
+        by_points = self.model.points.desc()
+        ranked = select(self.model.id,
+                        func.rank().over(order_by=by_points).label("place_from"),
+                        (func.rank().over(order_by=by_points)
+                         + func.count().over(partition_by=self.model.points) - 1).label("place_to"))\
+            .where(self.model.grid_id == grid_id)\
+            .subquery("ranked")
+        return update(self.model)\
+            .where(self.model.id == ranked.c.id)\
+            .values(place_from=ranked.c.place_from, place_to=ranked.c.place_to)\
+            .execution_options(synchronize_session=False)
@@ -1,5 +1,6 @@
 import grid_generator.services.circle
 import grid_generator.services.grid
+import grid_generator.services.live
 import grid_generator.services.playoff
 import grid_generator.services.queue
 import grid_generator.services.results
@@ -1,154 +1,169 @@
 import uuid
 
 from fastapi import APIRouter, HTTPException, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.jwt_checker import check_jwt
 from auth.models.db import User
-from grid_generator.repository import RoundRepository, MatchRepository, GameRepository
-from grid_generator.models.schemas import RoundSchema, BasicMatchSchema, GridSchema, GridSchemaWrapped, MatchSchema, \
-    WrappedMatchSchema, GameSchema, UpdateScoreSchema, SetGameCountSchema, ResultsSchema
-from grid_generator.services.results import get_next_match, update_next_match, get_update_winner
-from tournaments.models.schemas import BriefUserSchema
-from tournaments.models.utils import TournamentStatusENUM, GridTypeENUM
-from tournaments.repository import TournamentRepository, GridRepository
-from utils.dict import get_users_dict, to_dict_list
-from .playoff import get_playoff_results
-from .circle import get_circle_results
+from database import get_async_session, get_read_session
+from grid_generator.repository import RoundRepository, MatchRepository, GameRepository, StandingRepository
+from grid_generator.models.schemas import GridSchemaWrapped, MatchSchema, WrappedMatchSchema, GameSchema, \
+    UpdateScoreSchema, SetGameCountSchema, ResultsSchema
+from tournaments.models.utils import TournamentStatusENUM
+from tournaments.repository import TournamentRepository
+from utils.dict import get_users_dict
+from utils.serialization import from_row
+from utils.queries import query_budget
+from .results import get_results_object
+from .snapshot import get_snapshot_response, fence_grid_version
 
 
 grid_router = APIRouter(prefix='/grid', tags=['Grids'])
 
 
-@grid_router.get('/{tournament_id}')
+def get_match_data(row) -> dict:
+    """BasicMatchSchema data of a match row. Big payloads are assembled from dicts and validated once from
+    the root, one pass of pydantic-core is cheaper than constructing thousands of small models. A player
+    whose user is gone has no name from the outer join and is left out like an empty slot"""
+    names = (row.first_player_name, row.second_player_name)
+    players = [{"id": p, "full_name": name} if p and name is not None else None
+               for p, name in zip(row.players_id, names)]
+    return {"id": row.id, "players": players, "score": row.score}
+
+
+@grid_router.get('/{tournament_id}', dependencies=[Depends(query_budget(4))])
 async def get_grid(tournament_id: uuid.UUID,
-                   user: User = Depends(check_jwt), Authorization: str = Header()) -> GridSchemaWrapped:
+                   user: User = Depends(check_jwt), Authorization: str = Header(),
+                   session: AsyncSession = Depends(get_read_session)) -> GridSchemaWrapped:
     """Get grid data"""
-    tournament = await TournamentRepository().get(record_id=tournament_id)
+    row = await TournamentRepository(session).get_with_grid(record_id=tournament_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="The tournament doesn't exist.")
+    tournament, _grid = row
     if tournament.status != TournamentStatusENUM.PROGRESS:
         raise HTTPException(status_code=400, detail='The tournament has not begun yet')
-    grid_id = tournament.grid
-    _grid = await GridRepository().get(record_id=grid_id)
-    users = await get_users_dict(tournament.players_id)
+    fence_grid_version(session, _grid)
 
-    rounds = to_dict_list(await RoundRepository().find_all(conditions={'grid_id': grid_id}))
+    async def build() -> GridSchemaWrapped:
+        rounds = {}
+        for m in await MatchRepository(session).get_grid_matches(_grid.id):
+            _round = rounds.setdefault(m.round_id, {"id": m.round_id, "round_number": m.round_number, "matches": []})
+            _round["matches"].append(get_match_data(m))
 
-    for _round in rounds:
-        matches = to_dict_list(await MatchRepository().find_all(conditions={'round_id': _round["id"]}))
-        matches.sort(key=lambda m: m["grid_match_number"])
-        for m in matches:
-            m['players'] = [users.get(p) for p in m['players_id']]
-        _round['matches'] = [BasicMatchSchema(**m) for m in matches]
+        return GridSchemaWrapped.model_validate({"grid": {"id": _grid.id, "grid_type": _grid.grid_type,
+                                                          "rounds": list(rounds.values()), "third_place_match": None}})
 
-    rounds = [RoundSchema(**r) for r in rounds]
-    wrapped = GridSchemaWrapped(
-        grid=GridSchema(id=grid_id, grid_type=_grid.grid_type, rounds=rounds, third_place_match=None))
-    return wrapped
+    return await get_snapshot_response(("grid", tournament_id), _grid.version, build)
 
 
-@grid_router.get('/match/{id}')
+@grid_router.get('/match/{id}', dependencies=[Depends(query_budget(4))])
 async def get_match(id: uuid.UUID,
-                    user: User = Depends(check_jwt), Authorization: str = Header()) -> WrappedMatchSchema:
+                    user: User = Depends(check_jwt), Authorization: str = Header(),
+                    session: AsyncSession = Depends(get_async_session)) -> WrappedMatchSchema:
     """Get all match data"""
-    _match = await MatchRepository().get(record_id=id)
-    _round = await RoundRepository().get(record_id=_match.round_id)
+    _match = await MatchRepository(session).get(record_id=id)
+    if not _match:
+        raise HTTPException(status_code=404, detail="The match doesn't exist.")
 
-    _games = await GameRepository().find_all(conditions={'match_id': _match.id}) or []
+    _games = await GameRepository(session).get_match_games(_match.id)
 
     _players = await get_users_dict(_match.players_id)
     players = [_players.get(p) for p in _match.players_id]
 
-    games = []
-    for i in _games:
-        games.append(GameSchema(**i.__dict__))
-    for i in range(len(_games) + 1, _round.game_count + 1):
-        game_id = await GameRepository().add_match_game(_match.id, i)
-        game = await GameRepository().get(record_id=game_id)
-        games.append(GameSchema(**game.__dict__))
-
-    base = BasicMatchSchema(**_match.__dict__, players=players)
-    res = MatchSchema(**base.__dict__, games=sorted(games, key=lambda g: g.id))
+    games = [from_row(GameSchema, game) for game in _games]
+    res = from_row(MatchSchema, _match, players=players, games=games)
 
-    return WrappedMatchSchema(match=res)
+    return WrappedMatchSchema.model_construct(match=res)
 
 
-@grid_router.patch("/match/{id}")
+@grid_router.patch("/match/{id}", dependencies=[Depends(query_budget(5))])
 async def update_match(id: uuid.UUID, match_score: UpdateScoreSchema,
-                       user: User = Depends(check_jwt), Authorization: str = Header()) -> UpdateScoreSchema:
+                       user: User = Depends(check_jwt), Authorization: str = Header(),
+                       session: AsyncSession = Depends(get_async_session)) -> UpdateScoreSchema:
     """Update match score"""
-    _match = await MatchRepository().get(record_id=id)
+    _match = await MatchRepository(session).get(record_id=id)
     if not _match:
         raise HTTPException(status_code=404, detail="The match doesn't exist.")
     if not all(_match.players_id):
         raise HTTPException(status_code=400, detail="The match is not valid yet.")
-    await MatchRepository().update_one(record_id=id, data={"score": match_score.score})
+    match_repo = MatchRepository(session)
+    await match_repo.update_one(record_id=id, data={"score": match_score.score})
+    grid_id = await match_repo.bump_grid_version(id)
+    await match_repo.publish_grid_event(grid_id, {"type": "match", "id": id, "score": match_score.score})
     return match_score
 
 
-@grid_router.patch("/game/{id}")
+@grid_router.patch("/game/{id}", dependencies=[Depends(query_budget(5))])
 async def update_game(id: uuid.UUID, game_score: UpdateScoreSchema,
-                      user: User = Depends(check_jwt), Authorization: str = Header()) -> UpdateScoreSchema:
+                      user: User = Depends(check_jwt), Authorization: str = Header(),
+                      session: AsyncSession = Depends(get_async_session)) -> UpdateScoreSchema:
     """Update game score"""
-    game = await GameRepository().get(record_id=id)
+    game = await GameRepository(session).get(record_id=id)
     if not game:
         raise HTTPException(status_code=404, detail="The game doesn't exist.")
-    await GameRepository().update_one(record_id=id, data={"score": game_score.score})
+    game_repo = GameRepository(session)
+    await game_repo.update_one(record_id=id, data={"score": game_score.score})
+    grid_id = await game_repo.bump_grid_version(id)
+    await game_repo.publish_grid_event(grid_id, {"type": "game", "id": id, "match_id": game.match_id,
+                                                 "score": game_score.score})
     return game_score
 
 
-@grid_router.get("/match/{id}/end")
+@grid_router.get("/match/{id}/end", dependencies=[Depends(query_budget(8))])
 async def end_match(id: uuid.UUID,
-                    user: User = Depends(check_jwt), Authorization: str = Header()) -> uuid.UUID:
+                    user: User = Depends(check_jwt), Authorization: str = Header(),
+                    session: AsyncSession = Depends(get_async_session)) -> uuid.UUID:
     """End match, move winner on"""
-    _match = await MatchRepository().get(record_id=id)
-    _round = await RoundRepository().get(record_id=_match.round_id)
-    rounds = await RoundRepository().find_all(conditions={'grid_id': _round.grid_id})
-
-    main_rounds_count = max(rounds, key=lambda r: r.round_number).round_number
-    grid_match_number = _match.grid_match_number
-    round_number = _round.round_number
-
-    if not _round or not _match:
-        raise HTTPException(status_code=404, detail="The round or the match doesn't exist")
-    if not all(_match.players_id):
-        raise HTTPException(status_code=400, detail="The match is not valid yet.")
-
-    if round_number == main_rounds_count:
-        return await get_update_winner(_match, id)
-
-    next_match_number = await get_next_match(
-        grid_match_number,
-        round_number,
-        main_rounds_count)
-
-    winner_id = await get_update_winner(_match, id)
-
-    await update_next_match(grid_match_number, next_match_number, round_number, rounds, winner_id)
-    return winner_id
-
-
-@grid_router.get("/{tournament_id}/results")
+    match_repo = MatchRepository(session)
+    finished = await match_repo.finish_match(id)
+    if not finished:
+        match = await match_repo.get(record_id=id)
+        if not match:
+            raise HTTPException(status_code=404, detail="The match doesn't exist.")
+        if None in match.players_id:
+            raise HTTPException(status_code=400, detail="The match is not valid yet.")
+        raise HTTPException(status_code=400, detail="The next match has already been played.")
+
+    # the grid row stays locked until the commit, so matches of one grid ending at the same time update
+    # the standings one after the other, each seeing the other's result
+    grid_id = await match_repo.bump_grid_version(id)
+    await StandingRepository(session).update_match_standings(id)
+
+    await match_repo.publish_grid_event(grid_id, {"type": "match", "id": id, "winner_id": finished.winner_id})
+    for next_match_id, players_id in ((finished.next_match_id, finished.next_players_id),
+                                      (finished.loser_match_id, finished.loser_players_id)):
+        if next_match_id:
+            await match_repo.publish_grid_event(grid_id, {"type": "match", "id": next_match_id,
+                                                          "players_id": players_id})
+    return finished.winner_id
+
+
+@grid_router.get("/{tournament_id}/results", dependencies=[Depends(query_budget(4))])
 async def get_results(tournament_id: uuid.UUID,
-                      user: User = Depends(check_jwt), Authorization: str = Header()) -> ResultsSchema:
-    tournament = await TournamentRepository().get(record_id=tournament_id)
-
-    grid_id = tournament.grid
-    grid = await GridRepository().get(record_id=grid_id)
-    players = await get_users_dict(tournament.players_id, BriefUserSchema)
-
-    rounds = sorted(await RoundRepository().find_all(conditions={'grid_id': grid.id}), key=lambda r: r.round_number)
+                      user: User = Depends(check_jwt), Authorization: str = Header(),
+                      session: AsyncSession = Depends(get_read_session)) -> ResultsSchema:
+    row = await TournamentRepository(session).get_with_grid(record_id=tournament_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="The tournament doesn't exist.")
+    tournament, grid = row
+    fence_grid_version(session, grid)
 
-    res = await get_playoff_results(grid, rounds, players) if grid.grid_type == GridTypeENUM.PLAYOFF\
-        else await get_circle_results(rounds[0], players)
+    async def build() -> ResultsSchema:
+        standings = await StandingRepository(session).get_grid_standings(grid.id)
+        return ResultsSchema.model_construct(results=[get_results_object(row) for row in standings])
 
-    return ResultsSchema(results=res)
+    return await get_snapshot_response(("results", tournament_id), grid.version, build)
 
 
-@grid_router.patch("/round/{round_id}/set_game_count")
+@grid_router.patch("/round/{round_id}/set_game_count", dependencies=[Depends(query_budget(6))])
 async def set_game_count(round_id: uuid.UUID, game_count: SetGameCountSchema,
-                         user: User = Depends(check_jwt), Authorization: str = Header()):
-    _round = await RoundRepository().get(record_id=round_id)
+                         user: User = Depends(check_jwt), Authorization: str = Header(),
+                         session: AsyncSession = Depends(get_async_session)):
+    _round = await RoundRepository(session).get(record_id=round_id)
     if not _round:
         raise HTTPException(status_code=400, detail="Round doesn't exist.")
-    await RoundRepository.update_one(record_id=round_id, data={"game_count": game_count.game_count})
+    await RoundRepository(session).update_one(record_id=round_id, data={"game_count": game_count.game_count})
+    await GameRepository(session).resize_round_games(round_id, game_count.game_count)
+    await RoundRepository(session).bump_grid_version(round_id)
     return "ok"
 
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import asyncpg
+from fastapi import Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.jwt_checker import check_jwt
+from auth.models.db import User
+from config import settings
+from database import DATABASE_DIRECT_DSN, get_async_session
+from grid_generator.repository import GRID_EVENTS_CHANNEL
+from tournaments.repository import TournamentRepository
+from utils.metrics import LIVE_SUBSCRIBERS, LIVE_DROPPED
+from .grid import grid_router
+
+
+class LiveHub:
+    """Fans grid events out to this worker's stream subscribers from a single LISTEN connection"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self.connection: asyncpg.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.connection is not None and not self.connection.is_closed():
+                return
+            self.connection = await asyncpg.connect(
+                DATABASE_DIRECT_DSN, server_settings={"application_name": settings.DB_APPLICATION_NAME})
+            self.connection.add_termination_listener(self._on_termination)
+            await self.connection.add_listener(GRID_EVENTS_CHANNEL, self._on_notify)
+
+    async def stop(self) -> None:
+        async with self._lock:
+            if self.connection is not None and not self.connection.is_closed():
+                await self.connection.close()
+            self.connection = None
+        self._close_all()
+
+    @asynccontextmanager
+    async def subscribe(self, grid_id: uuid.UUID) -> AsyncIterator[asyncio.Queue]:
+        await self.start()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers[str(grid_id)].add(queue)
+        LIVE_SUBSCRIBERS.inc()
+        try:
+            yield queue
+        finally:
+            self._unsubscribe(str(grid_id), queue)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        grid_id = json.loads(payload)["grid_id"]
+        for queue in list(self.subscribers.get(grid_id, ())):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # A client this far behind is disconnected, it reconnects and refetches the grid
+                LIVE_DROPPED.inc()
+                self._unsubscribe(grid_id, queue)
+                self._close(queue)
+
+    def _on_termination(self, connection) -> None:
+        self.connection = None
+        self._close_all()
+
+    def _unsubscribe(self, grid_id: str, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(grid_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        LIVE_SUBSCRIBERS.dec()
+        if not queues:
+            del self.subscribers[grid_id]
+
+    def _close_all(self) -> None:
+        for queues in self.subscribers.values():
+            for queue in queues:
+                self._close(queue)
+
+    @staticmethod
+    def _close(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+live_hub = LiveHub(queue_size=settings.LIVE_QUEUE_SIZE)
+
+
+async def stream_grid_events(grid_id: uuid.UUID) -> AsyncIterator[str]:
+    async with live_hub.subscribe(grid_id) as queue:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=settings.LIVE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if payload is None:
+                return
+            yield f"data: {payload}\n\n"
+
+
+@grid_router.get("/{tournament_id}/live")
+async def get_live_grid(tournament_id: uuid.UUID,
+                        user: User = Depends(check_jwt), Authorization: str = Header(),
+                        session: AsyncSession = Depends(get_async_session)) -> StreamingResponse:
+    """Server-Sent Events stream of match and game score changes"""
+    row = await TournamentRepository(session).get_with_grid(record_id=tournament_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="The tournament doesn't exist.")
+    return StreamingResponse(stream_grid_events(row.Grid.id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -3,7 +3,6 @@ import uuid
 from math import log2
 
 from grid_generator.repository import RoundRepository, MatchRepository
-from grid_generator.services.results import get_match_results
 
 
 class PlayoffCreator:
@@ -11,72 +10,71 @@ class PlayoffCreator:
         self.players = shuffled_players
         self.grid_id = grid_id
         self.rounds_count = log2(len(shuffled_players))
+        self.rounds = []
         self.matches = []
+        self.round_matches = {}
         self.current_match_number = 1
         self.third_place_match = third_place_match
 
-    async def create(self) -> list:
+    def create(self) -> tuple[list[dict], list[dict]]:
         for round_number in range(1, int(self.rounds_count)+1):
-            round_id = await RoundRepository().add_round(round_number=round_number, grid_id=self.grid_id)
-            await self.add_round_matches(round_number, round_id)
+            round_id = self.add_round(round_number)
+            self.add_round_matches(round_number, round_id)
         if self.third_place_match:
-            round_id = await RoundRepository().add_round(round_number=0, grid_id=self.grid_id)
-            await self.add_round_matches(0, round_id)
-        return self.matches
+            round_id = self.add_round(0)
+            self.add_round_matches(0, round_id)
+        self.link_matches()
+        return self.rounds, self.matches
 
-    async def add_round_matches(self, round_number: int, round_id: uuid.UUID) -> None:
+    def link_matches(self) -> None:
+        """Stores where each match sends its winner, and its loser for the semifinals"""
+        rounds_count = int(self.rounds_count)
+        for round_number in range(1, rounds_count):
+            next_round = self.round_matches[round_number + 1]
+            for j, _match in enumerate(self.round_matches[round_number]):
+                _match["next_match_id"] = next_round[j // 2]["id"]
+                _match["next_match_slot"] = j % 2
+        if self.third_place_match and rounds_count > 1:
+            third_place = self.round_matches[0][0]
+            for j, _match in enumerate(self.round_matches[rounds_count - 1]):
+                _match["loser_match_id"] = third_place["id"]
+                _match["loser_match_slot"] = j % 2
+
+    def add_round(self, round_number: int) -> uuid.UUID:
+        _round = RoundRepository.round_data(round_number=round_number, grid_id=self.grid_id)
+        self.rounds.append(_round)
+        return _round["id"]
+
+    def add_round_matches(self, round_number: int, round_id: uuid.UUID) -> None:
+        first_match = len(self.matches)
         if round_number == 0:
-            return await self.add_third_place_round_match(round_id)
-        if round_number == 1:
-            return await self.add_first_round_matches(round_id)
-        await self.add_other_round_matches(round_id, round_number)
+            self.add_third_place_round_match(round_id)
+        elif round_number == 1:
+            self.add_first_round_matches(round_id)
+        else:
+            self.add_other_round_matches(round_id, round_number)
+        self.round_matches[round_number] = self.matches[first_match:]
 
-    async def add_first_round_matches(self, round_id: uuid.UUID) -> None:
+    def add_first_round_matches(self, round_id: uuid.UUID) -> None:
         for j in range(len(self.players) // 2):
             players = [self.players[j * 2], self.players[j * 2 + 1]]
-            _match = await MatchRepository().add_round_match(
-                round_id=round_id,
-                grid_number=self.current_match_number,
-                queue_number=self.current_match_number,
-                players=players)
-            self.current_match_number += 1
-            self.matches.append(_match)
+            self.add_match(round_id, players)
 
-    async def add_other_round_matches(self, round_id: uuid.UUID, round_number: int) -> None:
+    def add_other_round_matches(self, round_id: uuid.UUID, round_number: int) -> None:
         for j in range(int(2 ** (self.rounds_count - round_number))):
-            _match = await MatchRepository().add_round_match(round_id=round_id,
-                                                             grid_number=self.current_match_number,
-                                                             queue_number=self.current_match_number)
-            self.current_match_number += 1
-            self.matches.append(_match)
+            self.add_match(round_id)
 
-    async def add_third_place_round_match(self, round_id):
-        await MatchRepository().add_round_match(round_id=round_id,
-                                                grid_number=self.current_match_number,
-                                                queue_number=self.current_match_number)
+    def add_third_place_round_match(self, round_id: uuid.UUID) -> None:
+        self.add_match(round_id)
 
-
-async def create_playoff(players: list[uuid.UUID], grid_id: uuid.UUID, third_place_match: bool = False):
-    return await PlayoffCreator(players, grid_id, third_place_match).create()
+    def add_match(self, round_id: uuid.UUID, players: list[uuid.UUID] | None = None) -> None:
+        _match = MatchRepository.match_data(round_id=round_id,
+                                            grid_number=self.current_match_number,
+                                            queue_number=self.current_match_number,
+                                            players=players)
+        self.current_match_number += 1
+        self.matches.append(_match)
 
 
-async def get_playoff_results(grid, rounds, players):
-    worst = len(players.keys())
-    res = []
-    for _round in rounds:
-        if _round.round_number == 0:
-            continue
-
-        matches = await MatchRepository().find_all(conditions={'round_id': _round.id})
-        best = worst - len(matches) + 1
-        range_place = f"{best} — {worst}"
-        worst -= len(matches)
-
-        if best == 2:
-            res += await get_match_results(matches[0], players, "2", "1")
-        elif best == 3 and grid.third_place_match:
-            _match = rounds[0]
-            res += await get_match_results(_match, players, "4", "3")
-        else:
-            res += [await get_match_results(_match, players, range_place) for _match in matches]
-    return res
+async def create_playoff(players: list[uuid.UUID], grid_id: uuid.UUID, third_place_match: bool = False):
+    return PlayoffCreator(players, grid_id, third_place_match).create()
@@ -1,12 +1,19 @@
 import uuid
 
 import random
-from utils.dict import get_users_dict
 
-from tournaments.repository import TournamentRepository, GridRepository
-from .grid import grid_router
-from grid_generator.repository import RoundRepository, MatchRepository
-from ..models.schemas import QueueSchema, BasicMatchSchema
+from fastapi import Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_read_session
+from utils.pagination import encode_queue_cursor, decode_queue_cursor
+from utils.queries import query_budget
+
+from tournaments.repository import TournamentRepository
+from .grid import grid_router, get_match_data
+from .snapshot import get_snapshot_response, fence_grid_version
+from grid_generator.repository import MatchRepository
+from ..models.schemas import QueueSchema
 
 
 async def shuffle_players(players_id: list[uuid.UUID], grid_id: uuid.UUID) -> list[uuid.UUID]:
@@ -16,18 +23,37 @@ async def shuffle_players(players_id: list[uuid.UUID], grid_id: uuid.UUID) -> li
     return new_players
 
 
-@grid_router.get("/{tournament_id}/queue")
-async def get_queue(tournament_id: uuid.UUID) -> QueueSchema:
-    tournament = await TournamentRepository().get(record_id=tournament_id)
-    players = await get_users_dict(tournament.players_id)
-    grid = await GridRepository().get(record_id=tournament.grid)
-    rounds = await RoundRepository().find_all(conditions={"grid_id": grid.id})
-    res = [None] * 50
-
-    for _round in rounds:
-        matches = await MatchRepository().find_all(conditions={"round_id": _round.id})
-        for _match in matches:
-            match_dict = _match.__dict__
-            match_dict["players"] = [players.get(_id) for _id in match_dict["players_id"]]
-            res[match_dict["queue_match_number"]] = BasicMatchSchema(**match_dict)
-    return QueueSchema(matches=[x for x in res if x])
+def get_queue_position(cursor: str | None) -> tuple[int, uuid.UUID] | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_queue_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+@grid_router.get("/{tournament_id}/queue", dependencies=[Depends(query_budget(3))])
+async def get_queue(tournament_id: uuid.UUID,
+                    size: int | None = Query(ge=1, le=500, default=None),
+                    cursor: str | None = Query(default=None),
+                    unplayed: bool = Query(default=False),
+                    session: AsyncSession = Depends(get_read_session)) -> QueueSchema:
+    """Matches in queue order. size pages through it, unplayed=true keeps only what is still to be played"""
+    row = await TournamentRepository(session).get_with_grid(record_id=tournament_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="The tournament doesn't exist.")
+    _, grid = row
+    fence_grid_version(session, grid)
+    after = get_queue_position(cursor)
+
+    async def build() -> QueueSchema:
+        matches = await MatchRepository(session).get_queue_matches(grid.id, limit=size, after=after, unplayed=unplayed)
+        next_cursor = None
+        if size and len(matches) == size:
+            next_cursor = encode_queue_cursor(matches[-1].queue_match_number, matches[-1].id)
+        return QueueSchema.model_validate({"matches": [get_match_data(m) for m in matches],
+                                           "next_cursor": next_cursor})
+
+    # later pages aren't cached, a client paging through the queue would push the grid snapshots out
+    key = ("queue", tournament_id, size, unplayed) if cursor is None else None
+    return await get_snapshot_response(key, grid.version, build)
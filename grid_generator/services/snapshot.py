@@ -0,0 +1,35 @@
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import fence_replica
+from tournaments.models.db import Grid
+from tournaments.repository import GridRepository
+from utils.cache import TTLCache
+from utils.serialization import render
+
+# (kind, tournament_id, ...) -> (grid version, serialized response body)
+snapshot_cache = TTLCache("grid_snapshot", maxsize=settings.GRID_CACHE_SIZE, ttl=settings.GRID_CACHE_TTL)
+
+
+def fence_grid_version(session: AsyncSession, grid: Grid) -> None:
+    """Snapshots are built from the replica only once it has replayed this version of the grid, the one
+    a client refetching after a grid event has been told about"""
+    fence_replica(session, lambda replica: GridRepository(replica).has_version(grid.id, grid.version))
+
+
+async def get_snapshot_response(key: Hashable | None, version: int,
+                                build: Callable[[], Awaitable[BaseModel]]) -> Response:
+    """Serves the cached body while the grid version is unchanged, otherwise rebuilds and caches it. Without
+    a key the body is built every time"""
+    cached = snapshot_cache.get(key) if key is not None else None
+    if cached is not None and cached[0] == version:
+        content = cached[1]
+    else:
+        content = render(await build())
+        if key is not None:
+            snapshot_cache.set(key, (version, content))
+    return Response(content=content, media_type="application/json")
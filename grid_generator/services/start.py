@@ -1,5 +1,8 @@
 from http.client import HTTPException
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from grid_generator.repository import BracketRepository, StandingRepository
 from tournaments.repository import GridRepository
 from tournaments.models.utils import GridTypeENUM
 from .queue import shuffle_players
@@ -15,8 +18,10 @@ async def create_matches_by_grid_type(players, grid):
         return await create_circle(players, grid.id)
 
 
-async def start(tournament: dict) -> None:
+async def start(tournament: dict, session: AsyncSession | None = None) -> None:
     players = tournament["players_id"]
-    grid = await GridRepository().get(tournament["grid"])
+    grid = await GridRepository(session).get(tournament["grid"])
     players = await shuffle_players(players, grid.id)
-    await create_matches_by_grid_type(players, grid)
+    rounds, matches = await create_matches_by_grid_type(players, grid)
+    standings = [StandingRepository.standing_data(grid.id, p, len(players)) for p in players]
+    await BracketRepository(session).add_bracket(tournament["id"], rounds, matches, standings)
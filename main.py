@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 
@@ -9,6 +10,8 @@ from grid_generator.services.grid import grid_router
 from tournaments.services.sport import sport_router
 from tournaments.services.tournament import tournament_router
 from tournaments.services.user_actions import user_actions
+from utils.lifespan import lifespan
+from utils.metrics import MetricsMiddleware, metrics_router
 
 
 origins = [
@@ -16,6 +19,7 @@ origins = [
 ]
 
 middleware = [
+    Middleware(MetricsMiddleware),
     Middleware(
         CORSMiddleware,
         allow_origins=origins,
@@ -25,7 +29,8 @@ middleware = [
     )
 ]
 
-app = FastAPI(title="Office Tournament", middleware=middleware)
+app = FastAPI(title="Office Tournament", middleware=middleware, default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 
 
 @app.post("/say")
@@ -38,4 +43,5 @@ app.include_router(sport_router, tags=['Sport'])
 app.include_router(grid_router, tags=['Grids'])
 app.include_router(user_router, tags=['User Profile'])
 app.include_router(user_actions, tags=["User Actions"])
+app.include_router(metrics_router)
 
@@ -8,7 +8,7 @@ from alembic import context
 from config import settings
 from auth.models.db import User
 from tournaments.models.db import Tournament, Sport, Grid
-from grid_generator.models.db import Round, Match, Game
+from grid_generator.models.db import Round, Match, Game, Standing
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -0,0 +1,36 @@
+"""add unplayed queue index
+
+Revision ID: 21e2938f3352
+Revises: e008f26e5b4c
+Create Date: 2026-10-18 15:03:52.774160
+
+Partial index for MatchRepository.get_queue_matches(unplayed=True), the
+"next up" screen: only matches without a winner are indexed, so it stays
+small as the tournament goes on. Built CONCURRENTLY like the other hot
+path indexes.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '21e2938f3352'
+down_revision: Union[str, None] = 'e008f26e5b4c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_match_round_id_queue_match_number_unplayed', 'match',
+                        ['round_id', 'queue_match_number'], postgresql_where=sa.text('winner_id IS NULL'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_match_round_id_queue_match_number_unplayed', table_name='match',
+                      postgresql_concurrently=True)
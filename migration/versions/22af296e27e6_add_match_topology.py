@@ -0,0 +1,69 @@
+"""add match topology
+
+Revision ID: 22af296e27e6
+Revises: 9016076628a4
+Create Date: 2026-10-18 13:02:09.648120
+
+Every playoff match stores the match its winner advances to and the
+players_id slot it takes there; semifinals also store the third place match
+their loser goes to. Existing playoff grids are backfilled from the same
+round / position arithmetic end_match used before.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22af296e27e6'
+down_revision: Union[str, None] = '9016076628a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NUMBERED_PLAYOFF_MATCHES = """
+    WITH numbered AS (
+        SELECT match.id, round.grid_id, round.round_number,
+               row_number() OVER (PARTITION BY match.round_id ORDER BY match.grid_match_number) - 1 AS position,
+               max(round.round_number) OVER (PARTITION BY round.grid_id) AS final_round_number
+        FROM match
+        JOIN round ON round.id = match.round_id
+        JOIN grid ON grid.id = round.grid_id
+        WHERE grid.grid_type = 'PLAYOFF'
+    )
+"""
+
+
+def upgrade() -> None:
+    for column in ('next_match', 'loser_match'):
+        op.add_column('match', sa.Column(f'{column}_id', sa.UUID(), nullable=True))
+        op.add_column('match', sa.Column(f'{column}_slot', sa.Integer(), nullable=True))
+        op.create_foreign_key(f'match_{column}_id_fkey', 'match', 'match', [f'{column}_id'], ['id'],
+                              ondelete='SET NULL', deferrable=True, initially='DEFERRED')
+
+    op.execute(NUMBERED_PLAYOFF_MATCHES + """
+        UPDATE match
+        SET next_match_id = next.id, next_match_slot = current.position % 2
+        FROM numbered AS current
+        JOIN numbered AS next ON next.grid_id = current.grid_id
+            AND next.round_number = current.round_number + 1
+            AND next.position = current.position / 2
+        WHERE match.id = current.id AND current.round_number > 0
+    """)
+    op.execute(NUMBERED_PLAYOFF_MATCHES + """
+        UPDATE match
+        SET loser_match_id = third_place.id, loser_match_slot = current.position % 2
+        FROM numbered AS current
+        JOIN numbered AS third_place ON third_place.grid_id = current.grid_id AND third_place.round_number = 0
+        WHERE match.id = current.id AND current.round_number = current.final_round_number - 1
+            AND current.round_number > 0
+    """)
+
+
+def downgrade() -> None:
+    for column in ('loser_match', 'next_match'):
+        op.drop_constraint(f'match_{column}_id_fkey', 'match', type_='foreignkey')
+        op.drop_column('match', f'{column}_slot')
+        op.drop_column('match', f'{column}_id')
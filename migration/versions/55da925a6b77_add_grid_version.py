@@ -0,0 +1,26 @@
+"""add grid version
+
+Revision ID: 55da925a6b77
+Revises: c822c6c408ed
+Create Date: 2026-10-18 11:05:17.836204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '55da925a6b77'
+down_revision: Union[str, None] = 'c822c6c408ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('grid', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('grid', 'version')
@@ -0,0 +1,54 @@
+"""unique game number per match
+
+Revision ID: 9016076628a4
+Revises: 55da925a6b77
+Create Date: 2026-10-18 12:20:44.517093
+
+Games used to be created lazily on GET /grid/match/{id}, so concurrent
+viewers could insert the same game twice. Duplicates are removed (the copy
+with a score is kept), the unique constraint replaces the plain index, and
+games missing for existing matches are backfilled up to the round's
+game_count.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9016076628a4'
+down_revision: Union[str, None] = '55da925a6b77'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM game
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY match_id, game_number
+                    ORDER BY score = ARRAY[0, 0], id
+                ) AS copy_number
+                FROM game
+            ) AS numbered
+            WHERE copy_number > 1
+        )
+    """)
+    op.drop_index('ix_game_match_id_game_number', table_name='game')
+    op.create_unique_constraint('uq_game_match_id_game_number', 'game', ['match_id', 'game_number'])
+    op.execute("""
+        INSERT INTO game (id, match_id, game_number, score)
+        SELECT gen_random_uuid(), match.id, game_number, ARRAY[0, 0]
+        FROM match
+        JOIN round ON round.id = match.round_id
+        CROSS JOIN LATERAL generate_series(1, round.game_count) AS game_number
+        ON CONFLICT ON CONSTRAINT uq_game_match_id_game_number DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_game_match_id_game_number', 'game', type_='unique')
+    op.create_index('ix_game_match_id_game_number', 'game', ['match_id', 'game_number'])
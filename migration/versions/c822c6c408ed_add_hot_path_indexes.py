@@ -0,0 +1,63 @@
+"""add hot path indexes
+
+Revision ID: c822c6c408ed
+Revises: dbaa3614375a
+Create Date: 2026-10-18 10:12:41.302518
+
+Indexes are built CONCURRENTLY, so each one runs outside the migration
+transaction and does not block writes while it is being built.
+
+Query -> index it relies on:
+
+    MatchRepository.get_grid_matches,
+        get_queue_matches (Round.grid_id = ...)             ix_round_grid_id_round_number
+    MatchRepository.get_grid_matches
+        (round_id, ORDER BY grid_match_number),
+        GameRepository.resize_round_games (round_id)        ix_match_round_id_grid_match_number
+    GameRepository.get_match_games (match_id)               ix_game_match_id_game_number, replaced by
+                                                            uq_game_match_id_game_number in 9016076628a4
+    UserDAO.get_user_by_email, UserDAO.create_tokens        ix_user_email
+    TournamentRepository.find_user_tournaments,
+        count_user_tournaments
+        (players_id @> ARRAY[user_id])                      ix_tournament_players_id (GIN)
+    TournamentRepository.get_filter_conditions
+        status IN (...) + start_time range                  ix_tournament_status_start_time
+        sport_id = ... + start_time range                   ix_tournament_sport_id_start_time
+    TournamentRepository.get_page
+        ORDER BY start_time, id / keyset cursor             ix_tournament_start_time_id
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c822c6c408ed'
+down_revision: Union[str, None] = 'dbaa3614375a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_round_grid_id_round_number', 'round', ['grid_id', 'round_number'], {}),
+    ('ix_match_round_id_grid_match_number', 'match', ['round_id', 'grid_match_number'], {}),
+    ('ix_game_match_id_game_number', 'game', ['match_id', 'game_number'], {}),
+    ('ix_user_email', 'user', ['email'], {}),
+    ('ix_tournament_players_id', 'tournament', ['players_id'], {'postgresql_using': 'gin'}),
+    ('ix_tournament_status_start_time', 'tournament', ['status', 'start_time'], {}),
+    ('ix_tournament_sport_id_start_time', 'tournament', ['sport_id', 'start_time'], {}),
+    ('ix_tournament_start_time_id', 'tournament', ['start_time', 'id'], {}),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,112 @@
+"""add standing table
+
+Revision ID: e008f26e5b4c
+Revises: 22af296e27e6
+Create Date: 2026-10-18 14:10:37.215904
+
+Standings of tournaments that are already running or completed are
+backfilled from their finished matches. A playoff player's place range is
+the intersection of what each finished match gave them: in a round of c
+matches the winner keeps 1 — c and the loser gets c + 1 — 2c, and the third
+place match decides 3 and 4. Round robin places are ranked by points.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e008f26e5b4c'
+down_revision: Union[str, None] = '22af296e27e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('standing',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('grid_id', sa.UUID(), nullable=False),
+    sa.Column('player_id', sa.UUID(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('wins', sa.Integer(), nullable=False),
+    sa.Column('draws', sa.Integer(), nullable=False),
+    sa.Column('losses', sa.Integer(), nullable=False),
+    sa.Column('place_from', sa.Integer(), nullable=False),
+    sa.Column('place_to', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['grid_id'], ['grid.id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('grid_id', 'player_id', name='uq_standing_grid_id_player_id')
+    )
+
+    op.execute("""
+        INSERT INTO standing (id, grid_id, player_id, points, wins, draws, losses, place_from, place_to)
+        SELECT gen_random_uuid(), tournament.grid, player_id, 0, 0, 0, 0, 1, cardinality(tournament.players_id)
+        FROM tournament
+        CROSS JOIN unnest(tournament.players_id) AS player_id
+        WHERE tournament.status IN ('PROGRESS', 'COMPLETED')
+    """)
+    op.execute("""
+        WITH records AS (
+            SELECT standing.id,
+                   count(*) FILTER (WHERE match.winner_id = standing.player_id AND NOT is_draw) AS wins,
+                   count(*) FILTER (WHERE is_draw) AS draws,
+                   count(*) FILTER (WHERE match.winner_id != standing.player_id AND NOT is_draw) AS losses
+            FROM standing
+            JOIN grid ON grid.id = standing.grid_id
+            JOIN round ON round.grid_id = grid.id
+            JOIN match ON match.round_id = round.id AND match.winner_id IS NOT NULL
+                AND standing.player_id = ANY (match.players_id)
+            CROSS JOIN LATERAL (
+                SELECT grid.grid_type = 'CIRCLE' AND match.score[1] = match.score[2] AS is_draw
+            ) AS outcome
+            GROUP BY standing.id
+        )
+        UPDATE standing
+        SET wins = records.wins, draws = records.draws, losses = records.losses,
+            points = records.wins * 3 + records.draws
+        FROM records
+        WHERE standing.id = records.id
+    """)
+    op.execute("""
+        WITH round_sizes AS (
+            SELECT round_id, count(*) AS match_count FROM match GROUP BY round_id
+        ), outcomes AS (
+            SELECT standing.id,
+                   CASE WHEN round.round_number = 0 THEN CASE WHEN won THEN 3 ELSE 4 END
+                        WHEN won THEN 1 ELSE round_sizes.match_count + 1 END AS place_from,
+                   CASE WHEN round.round_number = 0 THEN CASE WHEN won THEN 3 ELSE 4 END
+                        WHEN won THEN round_sizes.match_count ELSE round_sizes.match_count * 2 END AS place_to
+            FROM standing
+            JOIN grid ON grid.id = standing.grid_id AND grid.grid_type = 'PLAYOFF'
+            JOIN round ON round.grid_id = grid.id
+            JOIN round_sizes ON round_sizes.round_id = round.id
+            JOIN match ON match.round_id = round.id AND match.winner_id IS NOT NULL
+                AND standing.player_id = ANY (match.players_id)
+            CROSS JOIN LATERAL (SELECT match.winner_id = standing.player_id AS won) AS outcome
+        )
+        UPDATE standing
+        SET place_from = places.place_from, place_to = places.place_to
+        FROM (
+            SELECT id, max(place_from) AS place_from, min(place_to) AS place_to FROM outcomes GROUP BY id
+        ) AS places
+        WHERE standing.id = places.id
+    """)
+    op.execute("""
+        UPDATE standing
+        SET place_from = ranked.place_from, place_to = ranked.place_to
+        FROM (
+            SELECT standing.id,
+                   rank() OVER (PARTITION BY standing.grid_id ORDER BY standing.points DESC) AS place_from,
+                   rank() OVER (PARTITION BY standing.grid_id ORDER BY standing.points DESC)
+                       + count(*) OVER (PARTITION BY standing.grid_id, standing.points) - 1 AS place_to
+            FROM standing
+            JOIN grid ON grid.id = standing.grid_id AND grid.grid_type = 'CIRCLE'
+        ) AS ranked
+        WHERE standing.id = ranked.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('standing')
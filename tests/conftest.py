@@ -0,0 +1,143 @@
+"""python -m pytest tests
+    TEST_DATABASE_DSN=postgresql://postgres@localhost:5432/postgres python -m pytest tests
+
+Tests that need Postgres run against a scratch database, on the server of TEST_DATABASE_DSN (an admin DSN)
+or on a throwaway cluster when the PostgreSQL server binaries are installed, and are skipped otherwise.
+
+The app reads its settings once at import, so the database is prepared and the environment set before any
+test module is collected. Every request runs with QUERY_BUDGET_MODE=raise, a route going over its query
+budget fails the test.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from benchmarks.postgres import LocalPostgres, ScratchDatabase, find_pg_binary
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+cluster: LocalPostgres | None = None
+database: ScratchDatabase | None = None
+
+
+def pytest_configure(config):
+    global cluster, database
+    os.environ["QUERY_BUDGET_MODE"] = "raise"
+    os.environ["WARMUP_ENABLED"] = "false"
+    dsn = os.environ.get("TEST_DATABASE_DSN")
+    if dsn is None:
+        try:
+            find_pg_binary("initdb")
+        except RuntimeError:
+            return
+        cluster = LocalPostgres()
+        dsn = cluster.start()
+    database = ScratchDatabase(dsn)
+    asyncio.run(database.create())
+    os.environ.update(database.app_env)
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def pytest_unconfigure(config):
+    if database is not None:
+        asyncio.run(database.drop())
+    if cluster is not None:
+        cluster.stop()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(anyio_backend):
+    """The app's engine on the scratch database. Every test runs in an event loop of its own, so the pool's
+    connections and the in-process caches don't outlive it"""
+    if database is None:
+        pytest.skip("needs PostgreSQL: set TEST_DATABASE_DSN or install the server binaries")
+    from auth.cache import token_cache, user_cache, profile_cache
+    from database import engine
+    from grid_generator.services.snapshot import snapshot_cache
+
+    yield
+    await engine.dispose()
+    for cache in (token_cache, user_cache, profile_cache, snapshot_cache):
+        cache.clear()
+
+
+@pytest.fixture
+async def client(db):
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def create_user(db):
+    """Returns the new user's id and the headers of its access token"""
+    from auth.models.db import User
+    from auth.user_dao import UserDAO
+    from config import settings
+    from database import async_session_maker
+
+    async def create_user(full_name: str = "Player") -> tuple[uuid.UUID, dict[str, str]]:
+        async with async_session_maker() as session:
+            user = User(id=uuid.uuid4(), full_name=full_name, email=f"{uuid.uuid4().hex}@example.com",
+                        hashed_password="-", gender="male", avatar_id=1)
+            session.add(user)
+            await session.commit()
+        token = UserDAO.generate_jwt_token("access", str(user.id), settings.JWT_ACCESS_TTL)
+        return user.id, {"Authorization": token}
+    return create_user
+
+
+@pytest.fixture
+def create_tournament(db):
+    from database import async_session_maker
+    from tournaments.models.db import Grid, Sport, Tournament
+    from tournaments.models.utils import GridTypeENUM, TournamentStatusENUM
+
+    async def create_tournament(admin_id: uuid.UUID, players_id: list[uuid.UUID] | None = None,
+                                teams_limit: int = 4, grid_type: GridTypeENUM = GridTypeENUM.PLAYOFF,
+                                status: TournamentStatusENUM = TournamentStatusENUM.REGISTRATION_CLOSE,
+                                start_time: datetime | None = None, third_place_match: bool = False) -> uuid.UUID:
+        start_time = start_time or datetime.now(timezone.utc) + timedelta(days=1)
+        async with async_session_maker() as session:
+            sport = Sport(id=uuid.uuid4(), name="Table tennis")
+            grid = Grid(id=uuid.uuid4(), grid_type=grid_type, third_place_match=third_place_match)
+            tournament = Tournament(
+                id=uuid.uuid4(), title="Tournament", sport_id=sport.id, start_time=start_time,
+                enroll_start_time=start_time - timedelta(days=7), enroll_end_time=start_time - timedelta(hours=1),
+                grid=grid.id, location="Office", admins_id=[admin_id], players_id=players_id, status=status,
+                team_players_limit=1, teams_limit=teams_limit)
+            session.add_all([sport, grid, tournament])
+            await session.commit()
+        return tournament.id
+    return create_tournament
+
+
+@pytest.fixture
+def start_tournament(client, create_user, create_tournament):
+    """A started tournament of player_count new users, with the admin's headers and the players' ids"""
+    from tournaments.models.utils import GridTypeENUM
+
+    async def start_tournament(player_count: int, grid_type: GridTypeENUM = GridTypeENUM.PLAYOFF,
+                               third_place_match: bool = False):
+        admin_id, headers = await create_user("Admin")
+        players_id = [(await create_user(f"Player {i}"))[0] for i in range(player_count)]
+        tournament_id = await create_tournament(admin_id, players_id, teams_limit=player_count, grid_type=grid_type,
+                                                third_place_match=third_place_match)
+        response = await client.get(f"/tournament/{tournament_id}/start", headers=headers)
+        assert response.status_code == 200, response.text
+        return tournament_id, headers, players_id
+    return start_tournament
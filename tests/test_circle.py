@@ -0,0 +1,30 @@
+from itertools import chain, combinations
+
+import pytest
+
+from grid_generator.services.circle import get_circle_rounds
+
+
+@pytest.mark.parametrize("player_count", range(2, 17))
+def test_every_pair_meets_once(player_count):
+    pairs = list(chain.from_iterable(get_circle_rounds(player_count)))
+
+    assert sorted(pairs) == list(combinations(range(player_count), 2))
+
+
+@pytest.mark.parametrize("player_count", range(2, 17))
+def test_nobody_plays_twice_in_a_round(player_count):
+    rounds = get_circle_rounds(player_count)
+
+    assert len(rounds) == player_count - 1 + player_count % 2
+    for _round in rounds:
+        players = list(chain.from_iterable(_round))
+        assert len(_round) == player_count // 2
+        assert len(players) == len(set(players))
+
+
+@pytest.mark.parametrize("player_count", range(3, 17, 2))
+def test_everyone_sits_out_once_with_an_odd_count(player_count):
+    resting = [set(range(player_count)).difference(*_round) for _round in get_circle_rounds(player_count)]
+
+    assert sorted(player for players in resting for player in players) == list(range(player_count))
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from database import async_session_maker
+from tournaments.models.db import Tournament
+from tournaments.models.utils import TournamentStatusENUM
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_enrolls_respect_the_limit(client, create_user, create_tournament):
+    admin_id, _ = await create_user()
+    tournament_id = await create_tournament(admin_id, teams_limit=3, status=TournamentStatusENUM.REGISTRATION_OPEN)
+    users = [await create_user() for _ in range(10)]
+
+    responses = await asyncio.gather(*(client.post(f"/user-actions/{tournament_id}/enroll", headers=headers)
+                                       for _, headers in users))
+
+    assert sorted(response.status_code for response in responses) == [200] * 3 + [400] * 7
+    async with async_session_maker() as session:
+        players_id = (await session.get(Tournament, tournament_id)).players_id
+    assert len(players_id) == len(set(players_id)) == 3
+
+
+async def test_concurrent_enrolls_of_one_user_count_once(client, create_user, create_tournament):
+    admin_id, _ = await create_user()
+    tournament_id = await create_tournament(admin_id, teams_limit=3, status=TournamentStatusENUM.REGISTRATION_OPEN)
+    user_id, headers = await create_user()
+
+    responses = await asyncio.gather(*(client.post(f"/user-actions/{tournament_id}/enroll", headers=headers)
+                                       for _ in range(5)))
+
+    assert sorted(response.status_code for response in responses) == [200] + [400] * 4
+    async with async_session_maker() as session:
+        assert (await session.get(Tournament, tournament_id)).players_id == [user_id]
+
+
+async def test_enroll_closed_tournament(client, create_user, create_tournament):
+    admin_id, _ = await create_user()
+    tournament_id = await create_tournament(admin_id, status=TournamentStatusENUM.REGISTRATION_CLOSE)
+    _, headers = await create_user()
+
+    response = await client.post(f"/user-actions/{tournament_id}/enroll", headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "The enrollment is not open."
@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tournaments.models.utils import GridTypeENUM
+from utils.pagination import decode_cursor, decode_queue_cursor, encode_cursor, encode_queue_cursor
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cursor_round_trip():
+    start_time, record_id = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), uuid.uuid4()
+    assert decode_cursor(encode_cursor(start_time, record_id)) == (start_time, record_id)
+    assert decode_queue_cursor(encode_queue_cursor(17, record_id)) == (17, record_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm90IGEgY3Vyc29y", encode_queue_cursor(3, uuid.uuid4())])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(datetime.now(timezone.utc), uuid.uuid4())])
+def test_invalid_queue_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_queue_cursor(cursor)
+
+
+async def page_through(client, method: str, url: str, key: str, size: int, **kwargs) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        params = {"size": size} if cursor is None else {"size": size, "cursor": cursor}
+        response = await client.request(method, url, params=params, **kwargs)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page[key]) <= size
+        items += page[key]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+async def test_tournament_pages_by_cursor(client, create_user, create_tournament):
+    user_id, headers = await create_user()
+    admin_id, _ = await create_user("Admin")
+    start_time = datetime.now(timezone.utc) + timedelta(days=3)
+    # two tournaments share a start time, the id breaks the tie
+    for days in (2, 0, 1, 0, 4):
+        await create_tournament(admin_id, [user_id], start_time=start_time + timedelta(days=days))
+
+    response = await client.post("/tournament/user_tournaments", params={"size": 100}, json={}, headers=headers)
+    expected = [tournament["id"] for tournament in response.json()["tournaments"]]
+    assert len(expected) == 5
+
+    tournaments = await page_through(client, "POST", "/tournament/user_tournaments", "tournaments", 2,
+                                     json={}, headers=headers)
+    assert [tournament["id"] for tournament in tournaments] == expected
+
+
+async def test_queue_pages_by_cursor(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(5, GridTypeENUM.CIRCLE)
+    response = await client.get(f"/grid/{tournament_id}/queue", headers=headers)
+    expected = [match["id"] for match in response.json()["matches"]]
+    assert len(expected) == 10
+
+    matches = await page_through(client, "GET", f"/grid/{tournament_id}/queue", "matches", 3, headers=headers)
+    assert [match["id"] for match in matches] == expected
+
+
+async def test_queue_invalid_cursor(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(3, GridTypeENUM.CIRCLE)
+
+    response = await client.get(f"/grid/{tournament_id}/queue", params={"size": 2, "cursor": "not a cursor"},
+                                headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor."
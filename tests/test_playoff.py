@@ -0,0 +1,78 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_rounds(client, tournament_id, headers) -> list[list[dict]]:
+    """Matches by round, the third place round last"""
+    response = await client.get(f"/grid/{tournament_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return [_round["matches"] for _round in response.json()["grid"]["rounds"]]
+
+
+def get_players(match: dict) -> list[str | None]:
+    return [player and player["id"] for player in match["players"]]
+
+
+async def play(client, match: dict, score: list[int], headers) -> str:
+    response = await client.patch(f"/grid/match/{match['id']}", json={"score": score}, headers=headers)
+    assert response.status_code == 200, response.text
+    response = await client.get(f"/grid/match/{match['id']}/end", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_winners_move_to_their_slot_of_the_next_match(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(4)
+    (first, second), (final,) = await get_rounds(client, tournament_id, headers)
+    assert get_players(final) == [None, None]
+
+    first_winner = await play(client, first, [3, 1], headers)
+    second_winner = await play(client, second, [0, 3], headers)
+
+    assert first_winner == get_players(first)[0]
+    assert second_winner == get_players(second)[1]
+    _, (final,) = await get_rounds(client, tournament_id, headers)
+    assert get_players(final) == [first_winner, second_winner]
+
+
+async def test_semifinal_losers_move_to_the_third_place_match(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(4, third_place_match=True)
+    (first, second), _, (third_place,) = await get_rounds(client, tournament_id, headers)
+
+    await play(client, first, [3, 1], headers)
+    await play(client, second, [3, 2], headers)
+
+    *_, (third_place,) = await get_rounds(client, tournament_id, headers)
+    assert get_players(third_place) == [get_players(first)[1], get_players(second)[1]]
+
+
+async def test_match_without_both_players_cant_end(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(4)
+    _, (final,) = await get_rounds(client, tournament_id, headers)
+
+    response = await client.get(f"/grid/match/{final['id']}/end", headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "The match is not valid yet."
+
+
+async def test_ending_again_replaces_the_winner_until_the_next_match_is_played(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(4)
+    (first, second), _ = await get_rounds(client, tournament_id, headers)
+    await play(client, first, [3, 1], headers)
+    await play(client, second, [3, 1], headers)
+
+    # a score correction before the final is played
+    corrected_winner = await play(client, first, [1, 3], headers)
+    assert corrected_winner == get_players(first)[1]
+    _, (final,) = await get_rounds(client, tournament_id, headers)
+    assert get_players(final) == [corrected_winner, get_players(second)[0]]
+
+    await play(client, final, [3, 0], headers)
+    response = await client.get(f"/grid/match/{first['id']}/end", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "The next match has already been played."
+    _, (final,) = await get_rounds(client, tournament_id, headers)
+    assert get_players(final) == [corrected_winner, get_players(second)[0]]
@@ -0,0 +1,40 @@
+import pytest
+
+from tournaments.models.utils import GridTypeENUM, TournamentStatusENUM
+from utils.queries import assert_max_queries
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_tournament_list_within_budget(client, create_user, create_tournament):
+    admin_id, _ = await create_user()
+    response = await client.post("/tournament/filters", params={"size": 2}, json={})
+    total_count = response.json()["total_count"]
+    for _ in range(3):
+        await create_tournament(admin_id, status=TournamentStatusENUM.REGISTRATION_OPEN)
+
+    # unfiltered: the page, the reltuples estimate and the exact count
+    with assert_max_queries(3):
+        response = await client.post("/tournament/filters", params={"size": 2}, json={})
+    assert response.status_code == 200
+    assert response.json()["total_count"] == total_count + 3
+
+    with assert_max_queries(2):
+        response = await client.post("/tournament/filters", params={"size": 2},
+                                     json={"status": [TournamentStatusENUM.REGISTRATION_OPEN.value]})
+    assert response.status_code == 200
+
+
+async def test_assert_max_queries_reports_statements(client, create_user, create_tournament):
+    admin_id, _ = await create_user()
+    tournament_id = await create_tournament(admin_id)
+
+    with pytest.raises(AssertionError, match="SELECT"):
+        with assert_max_queries(0):
+            await client.get(f"/tournament/{tournament_id}")
+
+
+async def test_start_within_budget(start_tournament):
+    # a round robin of 46 players has more than 1000 matches, the match insert stays a single statement
+    await start_tournament(46, GridTypeENUM.CIRCLE)
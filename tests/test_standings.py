@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from tournaments.models.utils import GridTypeENUM
+from test_playoff import get_players, get_rounds, play
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_places(client, tournament_id, headers) -> dict[str, str]:
+    response = await client.get(f"/grid/{tournament_id}/results", headers=headers)
+    assert response.status_code == 200, response.text
+    return {result["player"]["id"]: result["place"] for result in response.json()["results"]}
+
+
+def get_score(match: dict, winner: str | None) -> list[int]:
+    if winner is None:
+        return [1, 1]
+    return [3, 0] if get_players(match)[0] == winner else [0, 3]
+
+
+async def test_playoff_places_narrow_with_every_round(client, start_tournament):
+    tournament_id, headers, players_id = await start_tournament(4)
+    assert set((await get_places(client, tournament_id, headers)).values()) == {"1 — 4"}
+
+    (first, second), _ = await get_rounds(client, tournament_id, headers)
+    first_winner = await play(client, first, [3, 1], headers)
+    second_winner = await play(client, second, [3, 1], headers)
+    places = await get_places(client, tournament_id, headers)
+    assert places == {first_winner: "1 — 2", second_winner: "1 — 2",
+                      get_players(first)[1]: "3 — 4", get_players(second)[1]: "3 — 4"}
+
+    # ending a semifinal again gives the same ranges
+    await play(client, first, [3, 1], headers)
+    assert await get_places(client, tournament_id, headers) == places
+
+    _, (final,) = await get_rounds(client, tournament_id, headers)
+    champion = await play(client, final, [0, 3], headers)
+    places = await get_places(client, tournament_id, headers)
+    assert champion == second_winner
+    assert places[second_winner] == "1" and places[first_winner] == "2"
+
+
+async def test_round_robin_places_follow_points(client, start_tournament):
+    tournament_id, headers, players_id = await start_tournament(4, GridTypeENUM.CIRCLE)
+    best, second, *others = [str(player_id) for player_id in players_id]
+    (matches,) = await get_rounds(client, tournament_id, headers)
+
+    for match in matches:
+        players = get_players(match)
+        # best beats everyone, second everyone but best, the others draw with each other
+        winner = best if best in players else second if second in players else None
+        await play(client, match, get_score(match, winner), headers)
+
+    places = await get_places(client, tournament_id, headers)
+    assert places == {best: "1", second: "2", others[0]: "3 — 4", others[1]: "3 — 4"}
+
+
+async def test_matches_of_one_grid_ending_together(client, start_tournament):
+    tournament_id, headers, _ = await start_tournament(4, GridTypeENUM.CIRCLE)
+    (matches,) = await get_rounds(client, tournament_id, headers)
+    first = matches[0]
+    second = next(match for match in matches if not set(get_players(match)) & set(get_players(first)))
+    for match in (first, second):
+        response = await client.patch(f"/grid/match/{match['id']}", json={"score": [3, 0]}, headers=headers)
+        assert response.status_code == 200
+
+    responses = await asyncio.gather(*(client.get(f"/grid/match/{match['id']}/end", headers=headers)
+                                       for match in (first, second)))
+
+    assert [response.status_code for response in responses] == [200, 200]
+    places = await get_places(client, tournament_id, headers)
+    winners = {get_players(first)[0], get_players(second)[0]}
+    assert {player_id: place for player_id, place in places.items() if player_id in winners} == \
+        dict.fromkeys(winners, "1 — 2")
+    assert set(places.values()) == {"1 — 2", "3 — 4"}
@@ -1,9 +1,9 @@
 import enum
 import uuid
 
-from sqlalchemy import Column, UUID, String, DateTime, func, ARRAY, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, UUID, String, DateTime, func, Integer, ForeignKey, Boolean, Index
 from sqlalchemy.orm import mapped_column, Mapped
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.dialects.postgresql import ENUM, ARRAY
 
 from database import Base
 from tournaments.models.utils import TournamentStatusENUM, GridTypeENUM
@@ -35,6 +35,13 @@ class Tournament(Base):
     team_players_limit = Column(Integer, nullable=False)
     teams_limit = Column(Integer, nullable=False)
 
+    __table_args__ = (
+        Index('ix_tournament_players_id', players_id, postgresql_using='gin'),
+        Index('ix_tournament_status_start_time', status, start_time),
+        Index('ix_tournament_sport_id_start_time', sport_id, start_time),
+        Index('ix_tournament_start_time_id', start_time, id),
+    )
+
 
 class Grid(Base):
     __tablename__ = "grid"
@@ -43,3 +50,4 @@ class Grid(Base):
     grid_type = Column(ENUM(GridTypeENUM, name="grid_type_enum", create_type=False), nullable=False,
                        default=GridTypeENUM.PLAYOFF)
     third_place_match = Column(Boolean, nullable=False, default=False)
+    version = Column(Integer, nullable=False, default=0, server_default='0')
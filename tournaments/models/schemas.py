@@ -61,6 +61,7 @@ class PatchTournamentSchema(BaseModel):
 class TournamentResponse(BaseModel):
     total_count: int
     tournaments: List[GetTournamentSchemaWithSportTitle]
+    next_cursor: Optional[str] = None
 
 
 class TournamentFiltersSchema(BaseModel):
@@ -1,18 +1,21 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import select, func, and_, cast, Date, any_, text
+from sqlalchemy import select, update, func, and_, or_, not_, text, tuple_
 from sqlalchemy.exc import NoResultFound
 
-from database import async_session_maker
+from auth.models.db import User
+from config import app_settings
 from utils.repository import SQLALchemyRepository
 from tournaments.models.db import Tournament, Sport, Grid
+from utils.dates import get_day_range
 
 
 class TournamentRepository(SQLALchemyRepository):
     model = Tournament
 
     async def get_multiple(self, skip, limit):
-        async with async_session_maker() as session:
+        async with self.read_session() as session:
             try:
                 query = select(self.model).offset(skip).limit(limit)
                 result = await session.execute(query)
@@ -20,66 +23,127 @@ class TournamentRepository(SQLALchemyRepository):
             except NoResultFound:
                 return []
 
-    async def filter_tournaments(self, filters: dict):
-        async with async_session_maker() as session:
-            query = select(self.model)
-            conditions = []
+    def get_filter_conditions(self, filters: dict) -> list:
+        conditions = []
 
-            if 'sport_id' in filters and filters['sport_id'] is not None:
-                conditions.append(self.model.sport_id == filters['sport_id'])
+        if 'sport_id' in filters and filters['sport_id'] is not None:
+            conditions.append(self.model.sport_id == filters['sport_id'])
 
-            if 'start_time_from' in filters and filters['start_time_from'] is not None:
-                conditions.append(cast(self.model.start_time, Date) >= filters['start_time_from'])
+        start_time_from, start_time_to = get_day_range(filters.get('start_time_from'), filters.get('start_time_to'))
 
-            if 'start_time_to' in filters and filters['start_time_to'] is not None:
-                conditions.append(cast(self.model.start_time, Date) <= filters['start_time_to'])
+        if start_time_from is not None:
+            conditions.append(self.model.start_time >= start_time_from)
 
-            if 'status' in filters and filters['status'] is not None:
-                conditions.append(self.model.status.in_(filters['status']))
+        if start_time_to is not None:
+            conditions.append(self.model.start_time < start_time_to)
 
-            if 'is_solo' in filters:
-                if filters['is_solo'] is True:
-                    conditions.append(self.model.team_players_limit == 1)
-                elif filters['is_solo'] is False:
-                    conditions.append(self.model.team_players_limit > 1)
+        if 'status' in filters and filters['status'] is not None:
+            conditions.append(self.model.status.in_(filters['status']))
 
-            if conditions:
-                query = query.where(and_(*conditions))
-
-            result = await session.execute(query)
-            tournaments = result.scalars().all()
-            return tournaments
-
-    async def find_user_tournaments(self, user_id: uuid.UUID, filters: dict = None):
-        async with async_session_maker() as session:
-            query = select(self.model).where(self.model.players_id.any(user_id))
-            conditions = [self.model.players_id.any(user_id)]
-
-            if filters:
-                if 'sport_id' in filters and filters['sport_id'] is not None:
-                    conditions.append(self.model.sport_id == filters['sport_id'])
-
-                if 'start_time_from' in filters and filters['start_time_from'] is not None:
-                    conditions.append(cast(self.model.start_time, Date) >= filters['start_time_from'])
+        if 'is_solo' in filters:
+            if filters['is_solo'] is True:
+                conditions.append(self.model.team_players_limit == 1)
+            elif filters['is_solo'] is False:
+                conditions.append(self.model.team_players_limit > 1)
 
-                if 'start_time_to' in filters and filters['start_time_to'] is not None:
-                    conditions.append(cast(self.model.start_time, Date) <= filters['start_time_to'])
+        return conditions
 
-                if 'status' in filters and filters['status'] is not None:
-                    conditions.append(self.model.status.in_(filters['status']))
+    async def get_page(self, conditions: list, offset: int = 0, limit: int | None = None,
+                       after: tuple[datetime, uuid.UUID] | None = None):
+        async with self.read_session() as session:
+            query = select(self.model, Grid.grid_type, Sport.name.label("sport_title"))\
+                .join(Grid, Grid.id == self.model.grid)\
+                .join(Sport, Sport.id == self.model.sport_id)\
+                .order_by(self.model.start_time, self.model.id)
 
-                if 'is_solo' in filters:
-                    if filters['is_solo'] is True:
-                        conditions.append(self.model.team_players_limit == 1)
-                    elif filters['is_solo'] is False:
-                        conditions.append(self.model.team_players_limit > 1)
+            if after:
+                conditions = conditions + [tuple_(self.model.start_time, self.model.id) > tuple_(*after)]
 
             if conditions:
                 query = query.where(and_(*conditions))
 
+            query = query.offset(offset).limit(limit)
             result = await session.execute(query)
-            tournaments = result.scalars().all()
-            return tournaments
+            return result.all()
+
+    async def get_with_grid(self, record_id: uuid.UUID):
+        """Always from the primary: the grid's version keys the snapshots and fences the replica reads"""
+        async with self.get_session() as session:
+            query = select(self.model, Grid).join(Grid, Grid.id == self.model.grid).where(self.model.id == record_id)
+            result = await session.execute(query)
+            return result.one_or_none()
+
+    async def get_with_details(self, record_id: uuid.UUID):
+        async with self.read_session() as session:
+            query = select(self.model, Grid.grid_type, Sport.name.label("sport_title"), User.id.label("admin_id"),
+                           User.full_name.label("admin_full_name"), User.avatar_id.label("admin_avatar_id"))\
+                .join(Grid, Grid.id == self.model.grid)\
+                .join(Sport, Sport.id == self.model.sport_id)\
+                .outerjoin(User, User.id == self.model.admins_id[1])\
+                .where(self.model.id == record_id)
+            result = await session.execute(query)
+            return result.one_or_none()
+
+    async def count(self, conditions: list) -> int:
+        async with self.read_session() as session:
+            if not conditions:
+                estimate = (await session.execute(
+                    text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                    {"table": self.model.__tablename__})).scalar_one()
+                if estimate >= app_settings.TOURNAMENT_COUNT_ESTIMATE_THRESHOLD:
+                    return int(estimate)
+
+            query = select(func.count()).select_from(self.model)
+            if conditions:
+                query = query.where(and_(*conditions))
+            return (await session.execute(query)).scalar_one()
+
+    async def filter_tournaments(self, filters: dict, offset: int = 0, limit: int | None = None,
+                                 after: tuple[datetime, uuid.UUID] | None = None):
+        return await self.get_page(self.get_filter_conditions(filters), offset, limit, after)
+
+    async def count_tournaments(self, filters: dict) -> int:
+        return await self.count(self.get_filter_conditions(filters))
+
+    async def find_user_tournaments(self, user_id: uuid.UUID, filters: dict = None, offset: int = 0,
+                                    limit: int | None = None, after: tuple[datetime, uuid.UUID] | None = None):
+        conditions = [self.model.players_id.contains([user_id])] + self.get_filter_conditions(filters or {})
+        return await self.get_page(conditions, offset, limit, after)
+
+    async def count_user_tournaments(self, user_id: uuid.UUID, filters: dict = None) -> int:
+        conditions = [self.model.players_id.contains([user_id])] + self.get_filter_conditions(filters or {})
+        return await self.count(conditions)
+
+
+    async def add_player(self, record_id: uuid.UUID, player_id: uuid.UUID, allowed_statuses: set):
+        return await self.update_players(
+            record_id,
+            func.array_append(self.model.players_id, player_id, type_=self.model.players_id.type),
+            or_(self.model.players_id.is_(None), not_(self.model.players_id.any(player_id))),
+            func.coalesce(func.cardinality(self.model.players_id), 0) < self.model.teams_limit,
+            self.model.status.in_(allowed_statuses))
+
+    async def remove_player(self, record_id: uuid.UUID, player_id: uuid.UUID, allowed_statuses: set,
+                            admin_id: uuid.UUID | None = None):
+        conditions = [self.model.players_id.any(player_id), self.model.status.in_(allowed_statuses)]
+        if admin_id is not None:
+            conditions.append(self.model.admins_id.any(admin_id))
+        return await self.update_players(
+            record_id,
+            func.array_remove(self.model.players_id, player_id, type_=self.model.players_id.type),
+            *conditions)
+
+    async def update_players(self, record_id: uuid.UUID, players_id, *conditions):
+        """Conditional single-statement players_id update, returns the new row with its grid_type or None"""
+        async with self.get_session() as session:
+            stmt = update(self.model)\
+                .where(self.model.id == record_id, Grid.id == self.model.grid, *conditions)\
+                .values(players_id=players_id)\
+                .returning(*self.model.__table__.c, Grid.grid_type)\
+                .execution_options(synchronize_session=False)
+            result = (await session.execute(stmt)).mappings().one_or_none()
+            await self.commit(session)
+            return result
 
 
 class SportRepository(SQLALchemyRepository):
@@ -88,3 +152,8 @@ class SportRepository(SQLALchemyRepository):
 
 class GridRepository(SQLALchemyRepository):
     model = Grid
+
+    async def has_version(self, grid_id: uuid.UUID, version: int) -> bool:
+        async with self.get_session() as session:
+            query = select(self.model.id).where(self.model.id == grid_id, self.model.version >= version)
+            return (await session.execute(query)).first() is not None
@@ -2,9 +2,11 @@ from typing import List
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.jwt_checker import check_jwt
 from auth.models.db import User
+from database import get_async_session
 from tournaments.models.schemas import CreateSportSchema, GetSportSchema
 from tournaments.repository import SportRepository
 
@@ -13,16 +15,18 @@ sport_router = APIRouter(prefix='/sport', tags=['Sport'])
 
 @sport_router.post("/create", response_model=GetSportSchema)
 async def create_sport(sport: CreateSportSchema,
-                       user: User = Depends(check_jwt), Authorization: str = Header()) -> GetSportSchema:
+                       user: User = Depends(check_jwt), Authorization: str = Header(),
+                       session: AsyncSession = Depends(get_async_session)) -> GetSportSchema:
     """Создать вид спорта"""
-    sport_id = await SportRepository().add_one(sport.model_dump())
+    sport_id = await SportRepository(session).add_one(sport.model_dump())
     return GetSportSchema(id=sport_id, name=sport.name)
 
 
 @sport_router.get("/", response_model=List[GetSportSchema])
-async def get_sports(user: User = Depends(check_jwt), Authorization: str = Header()) -> List[GetSportSchema]:
+async def get_sports(user: User = Depends(check_jwt), Authorization: str = Header(),
+                     session: AsyncSession = Depends(get_async_session)) -> List[GetSportSchema]:
     """Получить список всех видов спорта"""
-    sports = await SportRepository().find_all()
+    sports = await SportRepository(session).find_all()
     result = []
     for sport in sports:
         sport = sport.__dict__
@@ -31,30 +35,33 @@ async def get_sports(user: User = Depends(check_jwt), Authorization: str = Heade
 
 
 @sport_router.get("/{id}", response_model=GetSportSchema)
-async def get_sport(id: UUID, user: User = Depends(check_jwt), Authorization: str = Header()) -> GetSportSchema:
+async def get_sport(id: UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+                    session: AsyncSession = Depends(get_async_session)) -> GetSportSchema:
     """Получить вид спорта по ID"""
-    sport = await SportRepository().find_one(record_id=id)
+    sport = await SportRepository(session).find_one(record_id=id)
     sport = sport.__dict__
     return GetSportSchema(**sport)
 
 
 @sport_router.patch("/update/{id}", response_model=GetSportSchema)
 async def update_sport(id: UUID, sport: CreateSportSchema,
-                       user: User = Depends(check_jwt), Authorization: str = Header()) -> GetSportSchema:
+                       user: User = Depends(check_jwt), Authorization: str = Header(),
+                       session: AsyncSession = Depends(get_async_session)) -> GetSportSchema:
     """Обновить информацию о спорте"""
-    if not SportRepository().find_one(record_id=id):
+    if not await SportRepository(session).find_one(record_id=id):
         raise HTTPException(status_code=404, detail="Sport not found")
-    await SportRepository().update_one(record_id=id, data=sport.model_dump())
+    await SportRepository(session).update_one(record_id=id, data=sport.model_dump())
     return GetSportSchema(id=id, name=sport.name)
 
 
 @sport_router.delete("/{id}", response_model=GetSportSchema)
 async def delete_sport(id: UUID,
-                       user: User = Depends(check_jwt), Authorization: str = Header()) -> GetSportSchema:
+                       user: User = Depends(check_jwt), Authorization: str = Header(),
+                       session: AsyncSession = Depends(get_async_session)) -> GetSportSchema:
     """Удалить вид спорта"""
-    sport = await SportRepository().find_one(record_id=id)
+    sport = await SportRepository(session).find_one(record_id=id)
     try:
-        await SportRepository().delete_one(record_id=id)
+        await SportRepository(session).delete_one(record_id=id)
     except HTTPException:
         raise HTTPException(status_code=404, detail="Sport not found")
     return GetSportSchema(**sport.__dict__)
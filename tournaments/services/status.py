@@ -1,50 +1,60 @@
 import uuid
 
 from fastapi import HTTPException, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.jwt_checker import check_jwt
 from auth.models.db import User
+from database import get_async_session
 from tournaments.models.utils import TournamentStatusENUM as TS
 from tournaments.repository import TournamentRepository
 from .tournament import tournament_router
 
 
-async def set_tournament_status(id: uuid.UUID, user: User, status: TS, allowed_statuses: set[TS] | None = None, msg=""):
-    tournament = await TournamentRepository().get(record_id=id)
+async def set_tournament_status(id: uuid.UUID, user: User, status: TS, allowed_statuses: set[TS] | None = None, msg="",
+                                session: AsyncSession | None = None):
+    tournament = await TournamentRepository(session).get(record_id=id)
     if user.id not in tournament.admins_id:
         raise HTTPException(status_code=403, detail="You cannot change the tournament status")
     if allowed_statuses and tournament.status not in allowed_statuses:
         raise HTTPException(status_code=400, detail=msg)
-    await TournamentRepository().update_one(record_id=id, data={"status": status})
+    await TournamentRepository(session).update_one(record_id=id, data={"status": status})
 
 
 @tournament_router.patch("/{id}/open-enroll")
-async def open_enroll(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header()):
+async def open_enroll(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+                      session: AsyncSession = Depends(get_async_session)):
     await set_tournament_status(id,
                                 user,
                                 TS.REGISTRATION_OPEN,
                                 {TS.SCHEDULED, TS.REGISTRATION_CLOSE},
-                                "Cannot open enrollment")
+                                "Cannot open enrollment",
+                                session)
     return "ok"
 
 
 @tournament_router.patch("/{id}/close-enroll")
-async def close_enroll(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header()):
+async def close_enroll(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+                       session: AsyncSession = Depends(get_async_session)):
     await set_tournament_status(id,
                                 user,
                                 TS.REGISTRATION_CLOSE,
                                 {TS.REGISTRATION_OPEN},
-                                "Cannot close enrollment")
+                                "Cannot close enrollment",
+                                session)
     return "ok"
 
 
 @tournament_router.patch("/{id}/cancel")
-async def cancel(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header()):
-    await set_tournament_status(id, user, TS.CANCELED, None)
+async def cancel(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+                 session: AsyncSession = Depends(get_async_session)):
+    await set_tournament_status(id, user, TS.CANCELED, None, session=session)
     return "ok"
 
 
 @tournament_router.patch("/{id}/end")
-async def end(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header()):
-    await set_tournament_status(id, user, TS.COMPLETED, {TS.PROGRESS}, msg="Cannot end the tournament")
+async def end(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+              session: AsyncSession = Depends(get_async_session)):
+    await set_tournament_status(id, user, TS.COMPLETED, {TS.PROGRESS}, msg="Cannot end the tournament",
+                                session=session)
     return "ok"
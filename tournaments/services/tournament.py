@@ -1,36 +1,51 @@
 import uuid
+from datetime import datetime
 from typing import List, Dict, Annotated
 
 from fastapi import APIRouter, HTTPException, Query, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.jwt_checker import check_jwt
 from auth.models.db import User
 from auth.repository import UserRepository
+from database import get_async_session, get_read_session
 from tournaments.models.schemas import CreateTournamentSchema, TournamentFiltersSchema, \
     GetTournamentPageSchema, BriefUserSchema, TournamentResponse, PatchTournamentSchema, \
     GetTournamentSchemaWithSportTitle
 from tournaments.repository import SportRepository, TournamentRepository, GridRepository
-from tournaments.models.utils import TournamentStatusENUM
-from utils.dict import get_id_dict
+from utils.dict import get_users_dict
+from utils.pagination import decode_cursor, get_next_cursor
+from utils.serialization import from_row, json_response
+from utils.queries import query_budget
 from grid_generator.services.start import start
 
 tournament_router = APIRouter(prefix='/tournament', tags=['Tournaments'])
 
 
-@tournament_router.post("/create", response_model=uuid.UUID)
+def get_cursor_position(cursor: str | None) -> tuple[datetime, uuid.UUID] | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+@tournament_router.post("/create", response_model=uuid.UUID, dependencies=[Depends(query_budget(5))])
 async def create_tournament(tournament: CreateTournamentSchema,
-                            user: User = Depends(check_jwt), Authorization: str = Header()) -> uuid.UUID:
+                            user: User = Depends(check_jwt), Authorization: str = Header(),
+                            session: AsyncSession = Depends(get_async_session)) -> uuid.UUID:
     """Создание турнира"""
-    if not await SportRepository().find_one(tournament.sport_id):
+    if not await SportRepository(session).find_one(tournament.sport_id):
         raise HTTPException(status_code=400, detail="The sport does not exist in the system.")
     if not tournament.enroll_start_time < tournament.enroll_end_time <= tournament.start_time:
         raise HTTPException(status_code=400, detail="Incorrect time frame of the tournament is specified.")
-    if not await UserRepository().find_one(tournament.admins_id[0]):
+    if not await UserRepository(session).find_one(tournament.admins_id[0]):
         raise HTTPException(status_code=400, detail="The ID of the User assigned to the role of "
                                                     "tournament administrator does not exist in the system.")
     if tournament.team_players_limit and tournament.teams_limit <= 0:
         raise HTTPException(status_code=400, detail="Incorrect number of players when creating a tournament.")
-    grid_id = await GridRepository().add_one({
+    grid_id = await GridRepository(session).add_one({
         "grid_type": f"{tournament.grid_type}",
         "third_place_match": tournament.third_place_match
     })
@@ -38,92 +53,83 @@ async def create_tournament(tournament: CreateTournamentSchema,
     del tournament_dict["grid_type"]
     del tournament_dict["third_place_match"]
     tournament_dict["grid"] = grid_id
-    result = await TournamentRepository().add_one(tournament_dict)
+    result = await TournamentRepository(session).add_one(tournament_dict)
     return result
 
 
-@tournament_router.post("/filters", response_model=TournamentResponse)
+@tournament_router.post("/filters", response_model=TournamentResponse, dependencies=[Depends(query_budget(3))])
 async def get_all_tournaments(filters: TournamentFiltersSchema,
                               page: int = Query(ge=1, default=1),
-                              size: int = Query(ge=1, le=100)) -> TournamentResponse:
+                              size: int = Query(ge=1, le=100),
+                              cursor: str | None = Query(default=None),
+                              session: AsyncSession = Depends(get_read_session)) -> TournamentResponse:
     """Получить турниры"""
-    offset_min = (page - 1) * size
-    offset_max = page * size
-
-    tournaments = await TournamentRepository().filter_tournaments(filters.model_dump())
+    after = get_cursor_position(cursor)
+    offset = 0 if after else (page - 1) * size
+    filters_dict = filters.model_dump()
 
-    sports_list = await SportRepository().get([t.sport_id for t in tournaments])
-    sports = get_id_dict(sports_list)
+    tournament_repo = TournamentRepository(session)
+    tournaments = await tournament_repo.filter_tournaments(filters_dict, offset=offset, limit=size, after=after)
+    total_count = await tournament_repo.count_tournaments(filters_dict)
 
-    result = []
-    for trnmt in tournaments:
-        grid = await GridRepository().get(trnmt.grid)
-        grid_type = grid.grid_type if grid else None
+    result = [from_row(GetTournamentSchemaWithSportTitle, trnmt, grid_type=grid_type, sport_title=sport_title)
+              for trnmt, grid_type, sport_title in tournaments]
 
-        tournament_dict = trnmt.__dict__
-        tournament_dict['grid_type'] = grid_type
-        tournament_dict['sport_title'] = sports[trnmt.sport_id].name
-        del tournament_dict['grid']
-        result.append(GetTournamentSchemaWithSportTitle(**tournament_dict))
+    return json_response(TournamentResponse.model_construct(
+        total_count=total_count, tournaments=result,
+        next_cursor=get_next_cursor([row.Tournament for row in tournaments], size)))
 
-    total_count = len(result)
-    return TournamentResponse(total_count=total_count, tournaments=result[offset_min:offset_max])
 
-
-@tournament_router.get("/{id}", response_model=GetTournamentPageSchema)
-async def get_tournament(id: uuid.UUID) -> GetTournamentPageSchema:
+@tournament_router.get("/{id}", response_model=GetTournamentPageSchema, dependencies=[Depends(query_budget(1))])
+async def get_tournament(id: uuid.UUID, session: AsyncSession = Depends(get_read_session)) -> GetTournamentPageSchema:
     """Получить турнир по ID"""
-    tournament = await TournamentRepository().get(record_id=id)
-    if not tournament:
+    row = await TournamentRepository(session).get_with_details(record_id=id)
+    if not row:
         raise HTTPException(status_code=400, detail="The tournament with the transferred ID does not exist.")
-    grid = await GridRepository().get(tournament.grid)
-    grid_type = grid.grid_type if grid else None
-
-    tournament_dict = tournament.__dict__
-    tournament_dict['grid_type'] = grid_type
-    del tournament_dict['grid']
+    tournament = row.Tournament
 
-    admin = await UserRepository().get(record_id=tournament.admins_id[0])
-    sport = await SportRepository().get(record_id=tournament.sport_id)
-
-    res = GetTournamentPageSchema(
-        **tournament_dict,
-        admin=BriefUserSchema(**admin.__dict__),
+    res = from_row(
+        GetTournamentPageSchema, tournament,
+        grid_type=row.grid_type,
+        admin=BriefUserSchema.model_construct(id=row.admin_id, full_name=row.admin_full_name,
+                                              avatar_id=row.admin_avatar_id),
         players_count=len(tournament.players_id) if tournament.players_id else 0,
-        sport_title=sport.name
+        sport_title=row.sport_title
     )
 
     return res
 
 
-@tournament_router.get("/{id}/players", response_model=List[BriefUserSchema])
-async def get_players(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header()) -> List[BriefUserSchema]:
+@tournament_router.get("/{id}/players", response_model=List[BriefUserSchema], dependencies=[Depends(query_budget(3))])
+async def get_players(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+                      session: AsyncSession = Depends(get_read_session)) -> List[BriefUserSchema]:
     """Получить игроков турнира"""
-    tournament = await TournamentRepository().get(record_id=id)
-    data = await UserRepository().get(tournament.players_id)
-    users = sorted((BriefUserSchema(**user.__dict__) for user in data), key=lambda p: p.full_name)
-    return users
+    tournament = await TournamentRepository(session).get(record_id=id)
+    users = await get_users_dict(tournament.players_id or [], schema=BriefUserSchema)
+    users = sorted(users.values(), key=lambda p: p.full_name)
+    return json_response(users)
 
 
-@tournament_router.get("/{id}/start")
-async def start_tournament(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header()) -> None:
+@tournament_router.get("/{id}/start", dependencies=[Depends(query_budget(9))])
+async def start_tournament(id: uuid.UUID, user: User = Depends(check_jwt), Authorization: str = Header(),
+                           session: AsyncSession = Depends(get_async_session)) -> None:
     """Начинает турнир"""
-    tournament = await TournamentRepository().get(record_id=id)
+    tournament = await TournamentRepository(session).get(record_id=id)
     if tournament.admins_id[0] != user.id:
         raise HTTPException(status_code=403, detail="You are not the owner of the tournament.")
     if len(tournament.players_id) != tournament.teams_limit:
         raise HTTPException(status_code=400, detail="The number of enrolled players doesn't match the preset")
-    await TournamentRepository().update_one(record_id=id, data={"status": TournamentStatusENUM.PROGRESS})
-    await start(tournament.__dict__)
+    await start(tournament.__dict__, session)
 
 
-@tournament_router.patch("/{id}")
+@tournament_router.patch("/{id}", dependencies=[Depends(query_budget(5))])
 async def patch_tournament(id: uuid.UUID, tournament: PatchTournamentSchema,
-                           user: User = Depends(check_jwt), Authorization: str = Header()):
+                           user: User = Depends(check_jwt), Authorization: str = Header(),
+                           session: AsyncSession = Depends(get_async_session)):
     """Редактирование турнира"""
 
-    tournament_repo = TournamentRepository()
-    sport_repo = SportRepository()
+    tournament_repo = TournamentRepository(session)
+    sport_repo = SportRepository(session)
 
     current_tournament = await tournament_repo.get(record_id=id)
     if not current_tournament:
@@ -144,40 +150,32 @@ async def patch_tournament(id: uuid.UUID, tournament: PatchTournamentSchema,
             raise HTTPException(status_code=400, detail="Incorrect time frame of the tournament is specified.")
 
     update_data = tournament.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(current_tournament, key, value)
-
-    updated_tournament_data = {key: getattr(current_tournament, key) for key in update_data.keys()}
 
-    await tournament_repo.update_one(record_id=id, data=updated_tournament_data)
+    await tournament_repo.update_one(record_id=id, data=update_data)
     result = await tournament_repo.get(record_id=id)
     return result
 
 
-@tournament_router.post("/user_tournaments", response_model=TournamentResponse)
+@tournament_router.post("/user_tournaments", response_model=TournamentResponse, dependencies=[Depends(query_budget(3))])
 async def get_user_tournaments(filters: TournamentFiltersSchema, user: User = Depends(check_jwt),
                                Authorization: Annotated[list[str] | None, Header()] = None,
                                page: int = Query(ge=1, default=1),
-                               size: int = Query(ge=1, le=100)) -> TournamentResponse:
+                               size: int = Query(ge=1, le=100),
+                               cursor: str | None = Query(default=None),
+                               session: AsyncSession = Depends(get_read_session)) -> TournamentResponse:
     """Получить турниры, в которых участвует пользователь"""
-    offset_min = (page - 1) * size
-    offset_max = page * size
-
-    tournaments = await TournamentRepository().find_user_tournaments(user.id, filters=filters.model_dump())
-
-    sports_list = await SportRepository().get([t.sport_id for t in tournaments])
-    sports = get_id_dict(sports_list)
+    after = get_cursor_position(cursor)
+    offset = 0 if after else (page - 1) * size
+    filters_dict = filters.model_dump()
 
-    result = []
-    for trnmt in tournaments:
-        grid = await GridRepository().get(trnmt.grid)
-        grid_type = grid.grid_type if grid else None
+    tournament_repo = TournamentRepository(session)
+    tournaments = await tournament_repo.find_user_tournaments(user.id, filters=filters_dict, offset=offset,
+                                                              limit=size, after=after)
+    total_count = await tournament_repo.count_user_tournaments(user.id, filters=filters_dict)
 
-        tournament_dict = trnmt.__dict__
-        tournament_dict['grid_type'] = grid_type
-        tournament_dict['sport_title'] = sports[trnmt.sport_id].name
-        del tournament_dict['grid']
-        result.append(GetTournamentSchemaWithSportTitle(**tournament_dict))
+    result = [from_row(GetTournamentSchemaWithSportTitle, trnmt, grid_type=grid_type, sport_title=sport_title)
+              for trnmt, grid_type, sport_title in tournaments]
 
-    total_count = len(result)
-    return TournamentResponse(total_count=total_count, tournaments=result[offset_min:offset_max])
+    return json_response(TournamentResponse.model_construct(
+        total_count=total_count, tournaments=result,
+        next_cursor=get_next_cursor([row.Tournament for row in tournaments], size)))
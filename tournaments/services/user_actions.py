@@ -2,77 +2,75 @@ import uuid
 from typing import Annotated
 
 from fastapi import HTTPException, Depends, Header, APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.jwt_checker import check_jwt
 from auth.models.db import User
-from auth.repository import UserRepository
+from database import get_async_session
+from utils.queries import query_budget
+from utils.serialization import from_row
 from tournaments.models.schemas import GetTournamentSchema
-from tournaments.repository import TournamentRepository, GridRepository
+from tournaments.models.utils import TournamentStatusENUM as TS
+from tournaments.repository import TournamentRepository
 
 user_actions = APIRouter(prefix="/user-actions", tags=["User Actions"])
 
 
-@user_actions.post("/{id}/enroll")
-async def user_enroll(id: uuid.UUID, user: User = Depends(check_jwt),
-                      Authorization: Annotated[list[str] | None, Header()] = None) -> GetTournamentSchema:
-    """Участвовать в турнире"""
-    tournament = await TournamentRepository().get(record_id=id)
-    grid_type = await GridRepository().get(record_id=tournament.grid)
-    players_id = tournament.players_id or []
-    if user.id in players_id:
-        raise HTTPException(status_code=400, detail="The user is already enrolled.")
-    if len(players_id) >= tournament.teams_limit:
-        raise HTTPException(status_code=400, detail="The players limit has been reached.")
-    if not await UserRepository().find_one(record_id=user.id):
-        raise HTTPException(status_code=400, detail="User doesn't exist.")
-    players_id.append(user.id)
-    await TournamentRepository().update_one(record_id=id, data={"players_id": players_id})
+ENROLL_STATUSES = {TS.REGISTRATION_OPEN}
+UNENROLL_STATUSES = {TS.SCHEDULED, TS.REGISTRATION_OPEN, TS.REGISTRATION_CLOSE}
 
-    tournament_dict = tournament.__dict__
-    tournament_dict['grid_type'] = grid_type.grid_type
-    return GetTournamentSchema(**tournament_dict)
 
-
-@user_actions.post("/{id}/unenroll")
+@user_actions.post("/{id}/enroll", dependencies=[Depends(query_budget(3))])
+async def user_enroll(id: uuid.UUID, user: User = Depends(check_jwt),
+                      Authorization: Annotated[list[str] | None, Header()] = None,
+                      session: AsyncSession = Depends(get_async_session)) -> GetTournamentSchema:
+    """Участвовать в турнире"""
+    tournament_repo = TournamentRepository(session)
+    tournament = await tournament_repo.add_player(id, user.id, ENROLL_STATUSES)
+    if not tournament:
+        tournament = await tournament_repo.get(record_id=id)
+        if not tournament:
+            raise HTTPException(status_code=404, detail="Tournament not found.")
+        players_id = tournament.players_id or []
+        if user.id in players_id:
+            raise HTTPException(status_code=400, detail="The user is already enrolled.")
+        if len(players_id) >= tournament.teams_limit:
+            raise HTTPException(status_code=400, detail="The players limit has been reached.")
+        raise HTTPException(status_code=400, detail="The enrollment is not open.")
+    return from_row(GetTournamentSchema, tournament)
+
+
+@user_actions.post("/{id}/unenroll", dependencies=[Depends(query_budget(3))])
 async def user_unenroll(id: uuid.UUID, user: User = Depends(check_jwt),
-                        Authorization: Annotated[list[str] | None, Header()] = None) -> GetTournamentSchema:
+                        Authorization: Annotated[list[str] | None, Header()] = None,
+                        session: AsyncSession = Depends(get_async_session)) -> GetTournamentSchema:
     """Выйти из турнира"""
-    tournament = await TournamentRepository().get(record_id=id)
+    tournament_repo = TournamentRepository(session)
+    tournament = await tournament_repo.remove_player(id, user.id, UNENROLL_STATUSES)
     if not tournament:
-        raise HTTPException(status_code=404, detail="Tournament not found.")
-
-    players_id = tournament.players_id or []
-
-    if user.id not in players_id:
-        raise HTTPException(status_code=400, detail="The user is not enrolled in the tournament.")
+        tournament = await tournament_repo.get(record_id=id)
+        if not tournament:
+            raise HTTPException(status_code=404, detail="Tournament not found.")
+        if user.id not in (tournament.players_id or []):
+            raise HTTPException(status_code=400, detail="The user is not enrolled in the tournament.")
+        raise HTTPException(status_code=400, detail="The tournament has already started.")
+    return from_row(GetTournamentSchema, tournament)
 
-    players_id.remove(user.id)
-    await TournamentRepository().update_one(record_id=id, data={"players_id": players_id})
 
-    grid_type = await GridRepository().get(record_id=tournament.grid)
-    tournament_dict = tournament.__dict__
-    tournament_dict['grid_type'] = grid_type.grid_type
-
-    return GetTournamentSchema(**tournament_dict)
-
-
-@user_actions.delete("/{id}/unenroll/{player_id}")
+@user_actions.delete("/{id}/unenroll/{player_id}", dependencies=[Depends(query_budget(3))])
 async def user_unenroll(id: uuid.UUID, player_id: uuid.UUID, user: User = Depends(check_jwt),
-                        Authorization: Annotated[list[str] | None, Header()] = None) -> GetTournamentSchema:
+                        Authorization: Annotated[list[str] | None, Header()] = None,
+                        session: AsyncSession = Depends(get_async_session)) -> GetTournamentSchema:
     """Удалить участника из турнира"""
-    tournament = await TournamentRepository().get(record_id=id)
-    grid_type = await GridRepository().get(record_id=tournament.grid)
-    players_id = tournament.players_id or []
-
-    if user.id not in tournament.admins_id:
-        raise HTTPException(status_code=403, detail="Only tournament admins can remove participants.")
-
-    if player_id not in players_id:
-        raise HTTPException(status_code=400, detail="The user is not enrolled in the tournament.")
-
-    players_id.remove(player_id)
-    await TournamentRepository().update_one(record_id=id, data={"players_id": players_id})
-
-    tournament_dict = tournament.__dict__
-    tournament_dict['grid_type'] = grid_type.grid_type
-    return GetTournamentSchema(**tournament_dict)
+    tournament_repo = TournamentRepository(session)
+    tournament = await tournament_repo.remove_player(id, player_id, UNENROLL_STATUSES, admin_id=user.id)
+    if not tournament:
+        tournament = await tournament_repo.get(record_id=id)
+        if not tournament:
+            raise HTTPException(status_code=404, detail="Tournament not found.")
+        if user.id not in tournament.admins_id:
+            raise HTTPException(status_code=403, detail="Only tournament admins can remove participants.")
+        if player_id not in (tournament.players_id or []):
+            raise HTTPException(status_code=400, detail="The user is not enrolled in the tournament.")
+        raise HTTPException(status_code=400, detail="The tournament has already started.")
+    return from_row(GetTournamentSchema, tournament)
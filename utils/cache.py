@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable
+
+from utils.metrics import CACHE_LOOKUPS, CACHE_ENTRIES
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry. Not shared between workers, its hits, misses and size are
+    exported to /metrics under its name."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._hits = CACHE_LOOKUPS.labels(name, "hit")
+        self._misses = CACHE_LOOKUPS.labels(name, "miss")
+        self._entries = CACHE_ENTRIES.labels(name)
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING or item[1] <= monotonic():
+            if item is not _MISSING:
+                del self._data[key]
+                self._entries.set(len(self._data))
+            self._misses.inc()
+            return default
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return item[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (value, monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        self._entries.set(len(self._data))
+
+    def pop(self, key: Hashable) -> None:
+        if self._data.pop(key, None) is not None:
+            self._entries.set(len(self._data))
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._entries.set(0)
@@ -0,0 +1,17 @@
+from datetime import datetime, date, time, timedelta
+from zoneinfo import ZoneInfo
+
+from config import settings
+
+
+def get_day_start(value: datetime | date) -> datetime:
+    """Midnight of the value's calendar day, in its own timezone or the app timezone when it is naive"""
+    tz = getattr(value, "tzinfo", None) or ZoneInfo(settings.TIMEZONE)
+    day = value.date() if isinstance(value, datetime) else value
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+def get_day_range(start: datetime | date | None, end: datetime | date | None) -> tuple[datetime | None, datetime | None]:
+    """Half-open [start, end) timestamp range covering the calendar days from start to end inclusive"""
+    return (get_day_start(start) if start is not None else None,
+            get_day_start(end) + timedelta(days=1) if end is not None else None)
@@ -1,14 +1,15 @@
 import uuid
 
-from auth.repository import UserRepository
+from auth.loader import user_loader
 from grid_generator.models.schemas import GridUserSchema
 from tournaments.models.schemas import BriefUserSchema
+from utils.serialization import from_row
 
 
-async def get_users_dict(users_id: list[uuid.UUID], schema=GridUserSchema) -> dict[uuid.UUID, GridUserSchema|BriefUserSchema]:
-    data = await UserRepository().get(users_id)
-    users = [schema(**user.__dict__) for user in data]
-    return {user.id: user for user in users}
+async def get_users_dict(users_id: list[uuid.UUID],
+                         schema=GridUserSchema) -> dict[uuid.UUID, GridUserSchema | BriefUserSchema]:
+    profiles = await user_loader.load_many(users_id)
+    return {user_id: from_row(schema, profile) for user_id, profile in profiles.items()}
 
 
 def get_id_dict(items: list):
@@ -0,0 +1,117 @@
+"""Worker start-up and shutdown. Without the warm-up the first requests of every worker open the pool's
+connections, compile their SQL and build the OpenAPI schema; with WARMUP_ENABLED uvicorn only starts
+accepting requests once that is done. On SIGTERM the worker stops accepting, lets the running requests
+finish, then closes the LISTEN connection, the pools and the bcrypt threads"""
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from auth.password import shutdown_password_hashing
+from auth.repository import UserRepository
+from auth.user_dao import UserDAO
+from config import settings, app_settings
+from database import engine, async_session_maker, replica_engine, replica_session_maker
+from grid_generator.repository import MatchRepository, GameRepository, StandingRepository
+from grid_generator.services.circle import get_circle_rounds
+from grid_generator.services.live import live_hub
+from tournaments.models.utils import TournamentStatusENUM
+from tournaments.repository import TournamentRepository, GridRepository
+
+
+logger = logging.getLogger(__name__)
+
+# matches no row, the statements are executed only to be compiled and prepared
+NO_ID = uuid.UUID(int=0)
+
+
+async def open_pool(db_engine: AsyncEngine) -> None:
+    """Opens pool_size connections at once, they are returned to the pool idle"""
+    results = await asyncio.gather(*(db_engine.connect() for _ in range(settings.DB_POOL_SIZE)),
+                                   return_exceptions=True)
+    connections = [result for result in results if not isinstance(result, BaseException)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in connections))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+
+async def compile_statements(session: AsyncSession) -> None:
+    """The statements of the hot routes go into the engine's compiled cache and are prepared by asyncpg"""
+    tournaments = TournamentRepository(session)
+    await tournaments.get(NO_ID)
+    await tournaments.get_with_grid(NO_ID)
+    await tournaments.get_with_details(NO_ID)
+    for filters in ({}, {"status": [TournamentStatusENUM.REGISTRATION_OPEN]}):
+        await tournaments.filter_tournaments(filters, limit=1)
+        await tournaments.count_tournaments(filters)
+    await tournaments.find_user_tournaments(NO_ID, limit=1)
+    await tournaments.count_user_tournaments(NO_ID)
+    await GridRepository(session).has_version(NO_ID, 0)
+
+    matches = MatchRepository(session)
+    await matches.get(NO_ID)
+    await matches.get_grid_matches(NO_ID)
+    for unplayed in (False, True):
+        await matches.get_queue_matches(NO_ID, limit=1, unplayed=unplayed)
+    await GameRepository(session).get_match_games(NO_ID)
+    await StandingRepository(session).get_grid_standings(NO_ID)
+
+    await UserRepository(session).get_brief_profiles([NO_ID])
+    await UserDAO(session).get_user_by_id(str(NO_ID))
+    await UserDAO(session).get_user_by_email("")
+
+
+async def warm_up_database(db_engine: AsyncEngine, session_maker: async_sessionmaker) -> None:
+    await open_pool(db_engine)
+    async with session_maker() as session:
+        await compile_statements(session)
+        await session.rollback()
+
+
+def warm_up_caches(app: FastAPI) -> None:
+    app.openapi()
+    for player_count in range(2, app_settings.DEFAULT_MAX_TEAMS_COUNT + 1):
+        get_circle_rounds(player_count)
+
+
+async def warm_up(app: FastAPI) -> None:
+    started = time.perf_counter()
+    warm_up_caches(app)
+    databases = [(engine, async_session_maker)]
+    if replica_engine is not None:
+        databases.append((replica_engine, replica_session_maker))
+    for db_engine, session_maker in databases:
+        try:
+            await warm_up_database(db_engine, session_maker)
+        except (OSError, SQLAlchemyError):
+            # the worker still starts, its requests open the connections themselves
+            logger.warning("Warm-up of %s failed", db_engine.url.host, exc_info=True)
+    logger.info("Warmed up in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+async def shut_down() -> None:
+    await live_hub.stop()
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    shutdown_password_hashing()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ENABLED:
+        await warm_up(app)
+    try:
+        yield
+    finally:
+        await shut_down()
@@ -0,0 +1,120 @@
+"""Prometheus metrics. Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+and /metrics aggregates the files of all workers, see gunicorn.conf.py"""
+import os
+import time
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, \
+    generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.queries import query_stats, get_request_stats
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency", ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled", ["method"],
+                             multiprocess_mode="livesum")
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements per request", ["route"],
+                            buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL statements per request", ["route"])
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+DB_POOL = Gauge("db_pool_connections", "Connection pool state", ["database", "state"], multiprocess_mode="livesum")
+DB_REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replication lag seen by the last check", multiprocess_mode="max")
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Lookups in the in-process caches", ["cache", "result"])
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held by the in-process caches", ["cache"], multiprocess_mode="livesum")
+LIVE_SUBSCRIBERS = Gauge("live_grid_subscribers", "Open grid event streams", multiprocess_mode="livesum")
+LIVE_DROPPED = Counter("live_grid_dropped_total", "Grid event streams closed for falling behind")
+PASSWORD_HASH_WAITING = Gauge("password_hash_waiting", "bcrypt calls waiting for a thread", multiprocess_mode="livesum")
+PASSWORD_HASH_RUNNING = Gauge("password_hash_running", "bcrypt calls running", multiprocess_mode="livesum")
+PASSWORD_HASHES = Counter("password_hashes_total", "bcrypt hashes and checks done")
+USER_LOADER_PENDING = Gauge("user_loader_pending", "Profile ids waiting for the next batch",
+                            multiprocess_mode="livesum")
+USER_LOADER_BATCHES = Counter("user_loader_batches_total", "Batched brief profile queries")
+USER_LOADER_PROFILES = Counter("user_loader_profiles_total", "Profiles loaded by the batched queries")
+USER_LOADER_DB_TIME = Histogram("user_loader_batch_seconds", "Time of the batched brief profile queries")
+
+
+def instrument_engine(engine: AsyncEngine, database: str = "primary") -> None:
+    """Records statements and their time into the current request's QueryStats and tracks the pool"""
+    sync_engine = engine.sync_engine
+    pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.inc()
+        stats = query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+    @event.listens_for(pool, "checkout")
+    @event.listens_for(pool, "checkin")
+    def update_pool_state(*args):
+        DB_POOL.labels(database, "checked_out").set(pool.checkedout())
+        DB_POOL.labels(database, "idle").set(pool.checkedin())
+        DB_POOL.labels(database, "overflow").set(max(pool.overflow(), 0))
+
+
+class MetricsMiddleware:
+    """Latency per route template and status, with the SQL statements the request ran"""
+
+    def __init__(self, app):
+        self.app = app
+        self.route_paths = {}
+
+    def get_route(self, scope) -> str:
+        # the router leaves the matched endpoint in the scope, unmatched paths share a label
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self.route_paths:
+            self.route_paths.update(
+                (route.endpoint, route.path) for route in scope["app"].routes if hasattr(route, "endpoint"))
+        return self.route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = get_request_stats()
+        token = query_stats.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(scope["method"])
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = self.get_route(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(elapsed)
+            REQUEST_QUERIES.labels(route).observe(stats.count)
+            REQUEST_DB_TIME.labels(route).observe(stats.duration)
+            in_progress.dec()
+            query_stats.reset(token)
+            stats.check(scope["method"], route)
+
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
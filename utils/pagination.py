@@ -0,0 +1,37 @@
+import base64
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(start_time: datetime, record_id: uuid.UUID) -> str:
+    raw = f"{start_time.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Raises ValueError for a cursor that was not produced by encode_cursor"""
+    try:
+        start_time, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(start_time), uuid.UUID(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def get_next_cursor(items: list, size: int) -> str | None:
+    if len(items) < size:
+        return None
+    return encode_cursor(items[-1].start_time, items[-1].id)
+
+
+def encode_queue_cursor(queue_number: int, record_id: uuid.UUID) -> str:
+    raw = f"{queue_number}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_queue_cursor(cursor: str) -> tuple[int, uuid.UUID]:
+    """Raises ValueError for a cursor that was not produced by encode_queue_cursor"""
+    try:
+        queue_number, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return int(queue_number), uuid.UUID(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,102 @@
+"""SQL statements per request, and query budgets that catch N+1 loops.
+
+A route declares its budget with `dependencies=[Depends(query_budget(3))]`. QUERY_BUDGET_MODE decides
+what exceeding it does: "off" only counts, "log" logs the statements with the code that ran them once
+the request is done, "raise" fails the statement over budget with QueryBudgetExceeded. Tests wrap
+calls in `assert_max_queries(n)`. Statements run outside of the request's context, like the batched
+profile queries of auth.loader, are not counted.
+"""
+import logging
+import os
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import greenlet
+
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_statement_origin() -> list[str]:
+    """The app's frames that led to the statement. Engine events run in SQLAlchemy's greenlet, the
+    awaiting coroutines are in the stack of its parent"""
+    current = greenlet.getcurrent()
+    frame = current.parent.gr_frame if current.parent is not None else None
+    return [f"  {f.filename}:{f.lineno} in {f.name}" for f in traceback.extract_stack(frame)
+            if f.filename.startswith(ROOT) and "site-packages" not in f.filename and f.filename != __file__]
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    budget: int | None = None
+    mode: str = "off"
+    capture: bool = False
+    statements: list[str] = field(default_factory=list)
+    # assert_max_queries around a request counts the request's statements as well
+    parent: "QueryStats | None" = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        if self.capture:
+            self.statements.append("\n".join([statement, *get_statement_origin()]))
+        if self.parent is not None:
+            self.parent.record(statement, elapsed)
+        if self.mode == "raise" and self.is_exceeded():
+            raise QueryBudgetExceeded(self.report())
+
+    def is_exceeded(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def report(self) -> str:
+        return f"{self.count} SQL statements over a budget of {self.budget}:\n\n" + "\n\n".join(self.statements)
+
+    def check(self, method: str, route: str) -> None:
+        """Called once the request is done, statements run before the budget was declared count too"""
+        if self.mode != "off" and self.is_exceeded():
+            logger.warning("Query budget exceeded by %s %s: %s", method, route, self.report())
+
+
+# set by MetricsMiddleware for the duration of a request
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def get_request_stats() -> QueryStats:
+    mode = settings.QUERY_BUDGET_MODE
+    return QueryStats(mode=mode, capture=mode != "off", parent=query_stats.get())
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many SQL statements a request may run"""
+    async def set_query_budget() -> None:
+        stats = query_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+    return set_query_budget
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """Fails with the offending statements when the block runs more than max_queries, including the
+    requests it sends through an in-process ASGI client"""
+    stats = QueryStats(budget=max_queries, capture=True)
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+    if stats.is_exceeded():
+        raise AssertionError(stats.report())
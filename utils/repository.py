@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 
 from sqlalchemy import insert, select, update, delete, or_, and_
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_async_session, async_session_maker
+from database import async_session_maker, get_replica_session
 
 
 class AbstractRepository(ABC):
@@ -35,20 +37,50 @@ class AbstractRepository(ABC):
 class SQLALchemyRepository(AbstractRepository):
     model = None
 
+    def __init__(self, session: AsyncSession | None = None):
+        self.session = session
+
+    @asynccontextmanager
+    async def get_session(self):
+        """Yields the injected request session, or a private one when the repository is used standalone"""
+        if self.session is not None:
+            yield self.session
+        else:
+            async with async_session_maker() as session:
+                yield session
+
+    @asynccontextmanager
+    async def read_session(self):
+        """For reads that tolerate replication lag: the replica when the unit of work allows it, otherwise
+        the same session as get_session"""
+        replica = await get_replica_session(self.session)
+        if replica is not None:
+            yield replica
+        else:
+            async with self.get_session() as session:
+                yield session
+
+    async def commit(self, session: AsyncSession):
+        """Request sessions are committed by their unit of work, standalone ones right away"""
+        if session is self.session:
+            await session.flush()
+        else:
+            await session.commit()
+
     async def add_one(self, data: dict):
-        async with async_session_maker() as session:
+        async with self.get_session() as session:
             stmt = insert(self.model).values(**data).returning(self.model.id)
             result = await session.execute(stmt)
-            await session.commit()
+            await self.commit(session)
             return result.scalar_one()
 
     async def add_one_class(self, data):
-        async with async_session_maker() as session:
+        async with self.get_session() as session:
             session.add(data)
-            await session.commit()
+            await self.commit(session)
 
     async def find_all(self, conditions: dict = None, OR=False, AND=False):
-        async with async_session_maker() as session:
+        async with self.read_session() as session:
             query = select(self.model)
 
             if conditions:
@@ -76,14 +108,14 @@ class SQLALchemyRepository(AbstractRepository):
             return data
 
     async def update_one(self, record_id, data: dict):
-        async with async_session_maker() as session:
+        async with self.get_session() as session:
             stmt = update(self.model).where(self.model.id == record_id).values(data)
             result = await session.execute(stmt)
-            await session.commit()
+            await self.commit(session)
             return result.rowcount
 
     async def find_one(self, record_id):
-        async with async_session_maker() as session:
+        async with self.read_session() as session:
             try:
                 query = select(self.model).where(self.model.id == record_id)
                 result = await session.execute(query)
@@ -92,10 +124,10 @@ class SQLALchemyRepository(AbstractRepository):
                 return False
 
     async def delete_one(self, record_id):
-        async with async_session_maker() as session:
+        async with self.get_session() as session:
             stmt = delete(self.model).where(self.model.id == record_id)
             result = await session.execute(stmt)
-            await session.commit()
+            await self.commit(session)
             return result.rowcount
 
     async def get(self, record_id):
@@ -106,7 +138,7 @@ class SQLALchemyRepository(AbstractRepository):
         else:
             single = False
 
-        async with async_session_maker() as session:
+        async with self.read_session() as session:
             if single:
                 try:
                     query = select(self.model)\
@@ -0,0 +1,44 @@
+"""Responses built from trusted database rows. The columns already guarantee the types, so models are
+constructed without validation and rendered by orjson straight from their fields. Everything else goes
+through FastAPI's response model and the app's default ORJSONResponse."""
+import uuid
+from collections.abc import Mapping
+from typing import Any, TypeVar
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def from_row(schema: type[Model], row: Any, **values) -> Model:
+    """The schema's fields taken from an ORM object or a row mapping, values override or add to them"""
+    if isinstance(row, Mapping):
+        data = {name: row[name] for name in schema.model_fields if name in row}
+    else:
+        data = {name: getattr(row, name) for name in schema.model_fields if hasattr(row, name)}
+    data.update(values)
+    return schema.model_construct(**data)
+
+
+def get_fields(obj: Any) -> dict:
+    # only called for what orjson can't serialize itself, UUID, datetime and enums it can. asyncpg returns
+    # the elements of uuid[] columns as its own UUID subclass, which orjson doesn't accept
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def render(content: BaseModel | list) -> bytes:
+    """Equivalent to model_dump_json for the app's schemas, they have no aliases or serializers. orjson keeps
+    the trailing zeros of microseconds"""
+    return orjson.dumps(content, default=get_fields, option=orjson.OPT_UTC_Z)
+
+
+def json_response(content: BaseModel | list, status_code: int = 200) -> Response:
+    """Skips FastAPI's validation and serialization of the response model"""
+    return Response(content=render(content), status_code=status_code, media_type="application/json")
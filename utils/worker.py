@@ -0,0 +1,11 @@
+from uvicorn.workers import UvicornWorker
+
+
+class GracefulUvicornWorker(UvicornWorker):
+    """uvicorn waits for running requests without a limit after SIGTERM, and live grid streams never end on
+    their own. They are cancelled a few seconds before gunicorn's graceful_timeout kills the worker, so the
+    lifespan shutdown still disposes the pools"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - 5, 1)